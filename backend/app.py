@@ -1,22 +1,42 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g, send_from_directory
 from flask_cors import CORS
 import logging
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
-import cv2
-import numpy as np
-import base64
-from werkzeug.utils import secure_filename
 import tempfile
-from moviepy import VideoFileClip
-import utils
+import lazy
+import vision
+import clip_context
+import retrieval
+import batch_execution
+from task_store import create_task_store
+from scheduler import ModelScheduler
+import jobs
+from preprocess_cache import PreprocessCache, cache_key
+import ingest
+from response_cache import ResponseCache
+import columnar
+import metrics
+import work_queue
 import math
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, as_completed, FIRST_EXCEPTION
+import multiprocessing
+import threading
+from functools import partial
+from contextlib import nullcontext
+import time
 import atexit
 import json
 from function_call_def import AVAILABLE_TASK_FUNCTIONS, AVAILABLE_FUNCTIONS
-from google import genai
+
+# cv2/numpy-backed modules load on first use, so workers boot fast and only
+# the endpoints that need them pay for them; see warm_up()
+utils = lazy.lazy_import('utils')
+sampling = lazy.lazy_import('sampling')
+transcription = lazy.lazy_import('transcription')
+proxy = lazy.lazy_import('proxy')
+render = lazy.lazy_import('render')
+disfluency = lazy.lazy_import('disfluency')
 
 # Load environment variables
 load_dotenv()
@@ -26,15 +46,71 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app, supports_credentials=True, resources={r"/*": {"origins": "*"}})
-
-with app.app_context():
-    tasks = {}
-    task_id = 0
+app.request_class = ingest.SpoolingRequest
+# Response headers the browser client may read: trace ids, context token stats and response cache hits
+CORS(app, supports_credentials=True, resources={r"/*": {"origins": "*"}},
+     expose_headers=["X-Trace-Id", "X-Context-Tokens", "X-Response-Cache"])
+
+# Agent tasks; point TASK_STORE at sqlite:///path/to/tasks.db to share them between worker processes
+task_store = create_task_store(
+    os.getenv('TASK_STORE', 'memory'),
+    ttl=int(os.getenv('TASK_TTL', 86400)),
+    max_tasks=int(os.getenv('TASK_MAX', 10000))
+)
+
+# Every model call goes through one scheduler with per-model concurrency and rate limits,
+# e.g. MODEL_LIMITS='{"gpt-4o": {"concurrency": 16, "rate": 10, "burst": 20}}'
+model_scheduler = ModelScheduler(
+    limits=json.loads(os.getenv('MODEL_LIMITS', '{}')),
+    max_retries=int(os.getenv('MODEL_MAX_RETRIES', 5)),
+    on_call=metrics.record_model_call
+)
+
+def _openai_client(**kwargs):
+    # openai is slow to import, so clients are built on their first call; retries are left to the scheduler
+    from openai import OpenAI, APIConnectionError
+    model_scheduler.add_retry_on(APIConnectionError)
+    return OpenAI(max_retries=0, **kwargs)
 
 # Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-gemini_client = OpenAI(api_key=os.getenv('GEMINI_API_KEY'), base_url="https://generativelanguage.googleapis.com/v1beta/openai/")
+client = model_scheduler.wrap(partial(_openai_client, api_key=os.getenv('OPENAI_API_KEY')))
+# OPENAI_BASE_URL / GEMINI_BASE_URL point the clients elsewhere, e.g. at benchmarks/stub_models.py
+gemini_client = model_scheduler.wrap(partial(_openai_client, api_key=os.getenv('GEMINI_API_KEY'), base_url=os.getenv('GEMINI_BASE_URL', "https://generativelanguage.googleapis.com/v1beta/openai/")))
+
+VISION_MODEL = "gpt-4o"
+TRANSCRIPTION_MODEL = "whisper-1"
+# 0 keeps transcription.CHUNK_SECONDS
+TRANSCRIPTION_CHUNK_SECONDS = float(os.getenv('TRANSCRIPTION_CHUNK_SECONDS', 0))
+TRANSCRIPTION_WORKERS = int(os.getenv('TRANSCRIPTION_WORKERS', 4))
+
+# Frame sampling and vision settings for /api/preprocess; every key is part of the cache key
+DEFAULT_PREPROCESS_OPTIONS = {
+    'interval': 1.0,
+    # 'auto', 'grab', 'seek', 'adaptive', or 'segmented' to decode in DECODE_WORKERS processes
+    'sampling_mode': 'auto',
+    # Max dHash bit distance for a frame to reuse the previous description, negative disables
+    'dedup_threshold': int(os.getenv('FRAME_DEDUP_THRESHOLD', 4)),
+    # sampling_mode 'adaptive': thumbnail change score that marks a shot boundary (0-255)
+    # and the longest run of seconds allowed without a fresh description
+    'scene_threshold': 30.0,
+    'max_gap': 5.0,
+    # Frames packed into one vision request
+    'vision_batch_size': int(os.getenv('VISION_BATCH_SIZE', 1)),
+    # Frames are downsized right after decode to this long edge (0 keeps full size);
+    # attributes, dedup hashes and vision images all use the proxy, sent at this JPEG quality
+    'proxy_long_edge': int(os.getenv('PROXY_LONG_EDGE', 768)),
+    'jpeg_quality': int(os.getenv('VISION_JPEG_QUALITY', 85))
+}
+
+preprocess_cache = PreprocessCache(
+    os.getenv('PREPROCESS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'gencut_preprocess_cache')),
+    int(os.getenv('PREPROCESS_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+)
+
+# Server-side renders are written here and kept for RENDER_TTL seconds
+RENDER_DIR = os.getenv('RENDER_DIR', os.path.join(tempfile.gettempdir(), 'gencut_renders'))
+RENDER_TTL = int(os.getenv('RENDER_TTL', 3600))
+os.makedirs(RENDER_DIR, exist_ok=True)
 
 # # Define the available functions
 # def trim_video(start_time: float, end_time: float) -> dict:
@@ -62,17 +138,63 @@ def trim_video(start_time: float, end_time: float) -> dict:
         }
     }
 
+# Planner/executor responses memoized by request; RESPONSE_CACHE_TTL=0 turns the cache off
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 3600))
+response_cache = ResponseCache(int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 512)), RESPONSE_CACHE_TTL)
+
+# Largest size a gzip/brotli request body may inflate to before it is refused with a 413
+REQUEST_BODY_MAX_BYTES = int(os.getenv('REQUEST_BODY_MAX_BYTES', columnar.MAX_DECOMPRESSED_BYTES))
+
+# Approximate token budget for the clip context sent with each planner/executor call, 0 for no limit
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', 16000))
+
+# BM25 indexes over clip contexts, built once per context payload
+context_indexes = retrieval.IndexCache()
+
+# Functions the executor may call for a step
+EXECUTOR_FUNCTIONS = [AVAILABLE_FUNCTIONS[name] for name in (
+    'cutClip', 'moveClip', 'adjustBrightness', 'trim_video', 'deleteClip', 'convertToGrayscale',
+    'applyColorGrading', 'adjustSaturation', 'addBlurEffect', 'applyFadeIn', 'applyFadeOut'
+)]
+
 # Add conversation history storage
 conversation_history = []
 
 # At the top of the file, after imports
-executor = ThreadPoolExecutor(max_workers=4)  # Create a global executor
+executor = ThreadPoolExecutor(max_workers=int(os.getenv('PREPROCESS_WORKERS', 4)))  # Create a global executor
+
+# sampling_mode 'segmented' decodes slices of the timeline in this many processes
+DECODE_WORKERS = int(os.getenv('DECODE_WORKERS', os.cpu_count() or 1))
+_decode_pool = None
+_decode_pool_lock = threading.Lock()
+
+def get_decode_pool():
+    # Started on first use; spawn keeps the workers free of this process's threads
+    global _decode_pool
+    with _decode_pool_lock:
+        if _decode_pool is None:
+            _decode_pool = ProcessPoolExecutor(
+                max_workers=DECODE_WORKERS, mp_context=multiprocessing.get_context('spawn')
+            )
+            atexit.register(_decode_pool.shutdown)
+        return _decode_pool
+
+# Model calls of /api/preprocess/batch videos share these workers, one fair lane per video
+model_queue = work_queue.FairWorkQueue(int(os.getenv('MODEL_QUEUE_WORKERS', 16)))
+atexit.register(model_queue.shutdown)
+# Videos of one batch preprocessed at the same time
+BATCH_PIPELINES = int(os.getenv('BATCH_PIPELINES', 8))
+
+# Background preprocess jobs run on the global executor
+job_manager = jobs.JobManager(executor, max_pending=int(os.getenv('PREPROCESS_MAX_PENDING_JOBS', 16)))
+
+FRAME_DESC_PROMPT = "You are a helpful assistant for the blind. describe the frame as specificely as you can. be specific in terms of the colors in the frame, what might be happening to the best of your knowledge. be as specific as you can."
 
 def gpt_frame_desc(base64_image):
     messages = [
         {
             "role": "system",
-            "content": "You are a helpful assistant for the blind. describe the frame as specificely as you can. be specific in terms of the colors in the frame, what might be happening to the best of your knowledge. be as specific as you can."
+            "content": FRAME_DESC_PROMPT
         },
         {"role": "user", "content": [
                 {"type": "text", "text": f"Here is a frame from a video. Describe it vividly."},
@@ -86,118 +208,544 @@ def gpt_frame_desc(base64_image):
     ]
 
     response = client.chat.completions.create(
-        model="gpt-4o",
+        model=VISION_MODEL,
         messages=messages,
         max_tokens=100
     )
 
     return response.choices[0].message.content
 
+def gpt_frames_desc(base64_images):
+    # One request for several consecutive frames; None when the reply can't be split per frame
+    count = len(base64_images)
+    content = [{
+        "type": "text",
+        "text": f"Here are {count} consecutive frames from a video, in order. Describe each one vividly. "
+                f"Reply with a JSON object {{\"frames\": [...]}} holding exactly {count} descriptions, one string per frame, in the same order."
+    }]
+    for base64_image in base64_images:
+        content.append({
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:image/jpeg;base64,{base64_image}"
+            }
+        })
+
+    response = client.chat.completions.create(
+        model=VISION_MODEL,
+        messages=[
+            {"role": "system", "content": FRAME_DESC_PROMPT},
+            {"role": "user", "content": content}
+        ],
+        max_tokens=100 * count + 50,
+        response_format={"type": "json_object"}
+    )
 
-def preprocess_image(video_duration, video_path):
+    try:
+        descriptions = json.loads(response.choices[0].message.content)["frames"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(descriptions, list):
+        return None
+    return [str(description) for description in descriptions]
+
+
+class PreprocessCancelled(Exception):
+    pass
+
+def _report_frame(on_frame, index, attr, future):
+    if not future.cancelled() and future.exception() is None:
+        on_frame(index, future.result(), attr)
+
+def _timed_iter(iterable, steps, step):
+    # Adds the time spent producing each item to steps[step]
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            steps[step] = steps.get(step, 0.0) + time.perf_counter() - start
+        yield item
+
+def preprocess_image(video_duration, video_path, options=None, cancel_event=None, on_frame=None, stats=None,
+                     vision_executor=None):
     # returns image description per second and 
-    print("in preprocess image")
+    options = {**DEFAULT_PREPROCESS_OPTIONS, **(options or {})}
+    stats = stats if stats is not None else {}
+    stats.update({"frames": 0, "vision_calls": 0, "vision_calls_saved": 0})
+    # Seconds spent in each step of the frame loop
+    steps = {}
 
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
     frames = []
-    frame_count = 0
-
     attrs = []
-
-    with ThreadPoolExecutor() as executor:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_count % int(fps) == 0:
-                # Convert frame to JPEG
-                _, buffer = cv2.imencode('.jpg', frame)
-                base64_frame = base64.b64encode(buffer).decode('utf-8')
-                
-                # Submit the gpt_frame_desc call to the executor
-                future = executor.submit(gpt_frame_desc, base64_frame)
+    group_hash = None
+
+    if options['sampling_mode'] == 'segmented':
+        # Workers already shrink frames to the proxy size
+        samples = (
+            (timestamp, frame, [frame])
+            for timestamp, frame in sampling.iter_segmented_frames(
+                video_path, options['interval'], get_decode_pool(), DECODE_WORKERS, options['proxy_long_edge']
+            )
+        )
+    elif options['sampling_mode'] == 'adaptive':
+        samples = sampling.iter_adaptive_frames(
+            video_path, options['interval'], options['scene_threshold'], options['max_gap']
+        )
+    else:
+        samples = (
+            (timestamp, frame, [frame])
+            for timestamp, frame in sampling.iter_sampled_frames(video_path, options['interval'], options['sampling_mode'])
+        )
+
+    samples = _timed_iter(samples, steps, 'decode')
+    # Segmented workers shrink frames before they get here, so the encoder is told the real size
+    source_size = sampling.frame_size(video_path) if options['sampling_mode'] == 'segmented' else None
+    encoder = proxy.ProxyEncoder(options['proxy_long_edge'], options['jpeg_quality'], source_size)
+
+    with (nullcontext(vision_executor) if vision_executor is not None else ThreadPoolExecutor()) as executor:
+        batcher = vision.FrameBatcher(
+            executor, metrics.bind(gpt_frame_desc), metrics.bind(gpt_frames_desc), options['vision_batch_size']
+        )
+
+        try:
+            for _, frame, key_frames in samples:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise PreprocessCancelled("Frame description cancelled")
+
+                step_start = time.perf_counter()
+                source_frames = key_frames or [frame]
+                frame = encoder.proxy(frame)
+                key_frames = [encoder.proxy(key_frame) for key_frame in key_frames]
+                attributes_start = time.perf_counter()
+
+                attrs.append(utils.get_frame_attributes(frame))
+                stats["frames"] += 1
+                hash_start = time.perf_counter()
+
+                # Near-duplicates of the current group's first frame reuse its description,
+                # as do adaptive slots without a new shot
+                frame_hash = utils.get_dhash(key_frames[-1]) if key_frames and options['dedup_threshold'] >= 0 else None
+                steps['proxy'] = steps.get('proxy', 0.0) + attributes_start - step_start
+                steps['attributes'] = steps.get('attributes', 0.0) + hash_start - attributes_start
+                steps['dedup_hash'] = steps.get('dedup_hash', 0.0) + time.perf_counter() - hash_start
+                if frames and (not key_frames or (
+                        group_hash is not None and utils.hash_distance(frame_hash, group_hash) <= options['dedup_threshold'])):
+                    future = frames[-1]
+                    stats["vision_calls_saved"] += 1
+                else:
+                    group_hash = frame_hash
+                    base64_frames = [
+                        encoder.encode(proxy_frame, source)
+                        for proxy_frame, source in zip(key_frames or [frame], source_frames)
+                    ]
+
+                    # Queue the descriptions; several shots inside one slot are joined in order
+                    futures = [batcher.add(base64_frame) for base64_frame in base64_frames]
+                    future = futures[0] if len(futures) == 1 else vision.join_futures(futures, ' Then: ')
+                    stats["vision_calls"] += len(base64_frames)
+
+                if on_frame is not None:
+                    future.add_done_callback(partial(_report_frame, on_frame, len(frames), attrs[-1]))
                 frames.append(future)  # Store the future object
 
-                attrs.append({
-                    "rgb_level": utils.get_rgb_levels(frame),
-                    "saturation": utils.get_saturation(frame),
-                    "contrast": utils.get_contrast(frame),
-                    "brightness": utils.get_brightness(frame)
-                })
-            
-            frame_count += 1
+            batcher.flush()
+
+            # Wait for the descriptions; the first failure or a cancel stops waiting
+            wait_start = time.perf_counter()
+            pending = set(frames)
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    if not future.cancelled() and future.exception() is not None:
+                        raise future.exception()
+                if cancel_event is not None and cancel_event.is_set():
+                    raise PreprocessCancelled("Frame description cancelled")
+            frames = [future.result() for future in frames]
+            steps['vision_wait'] = time.perf_counter() - wait_start
+        except BaseException:
+            # Otherwise every queued description runs before the error surfaces
+            batcher.cancel()
+            executor.shutdown(cancel_futures=True)
+            raise
+
+    if options['interval'] != 1.0:
+        # Results are indexed by second; several samples in one second are joined,
+        # and sparser samples are repeated until the next one
+        slots = sampling.per_second_slots(len(frames), options['interval'], math.ceil(video_duration) or None)
+        frames = [' Then: '.join(dict.fromkeys(frames[i] for i in indexes)) for indexes in slots]
+        attrs = [attrs[indexes[0]] for indexes in slots]
+        stats["seconds"] = len(slots)
+
+    steps['jpeg_encode'] = encoder.encode_seconds
+    for step, seconds in steps.items():
+        metrics.record('preprocess_step', seconds, step=step)
+    stats.update(batcher.stats())
+    stats["proxy"] = encoder.stats()
+    stats["steps"] = {step: round(seconds, 3) for step, seconds in steps.items()}
+
+    return frames, attrs
 
-    cap.release()
 
-    # Wait for all futures to complete and retrieve results
-    frames = [future.result() for future in frames]
+def get_transcript(video_path, cancel_event=None, pass_fds=(), executor=None):
+    with metrics.span('preprocess_step', step='audio_decode'):
+        samples = transcription.load_audio(video_path, pass_fds=pass_fds)
 
-    return frames, attrs
+    if cancel_event is not None and cancel_event.is_set():
+        raise PreprocessCancelled("Transcription cancelled")
 
+    with metrics.span('preprocess_step', step='whisper'):
+        words, duration = transcription.transcribe_chunked(
+            client, samples, TRANSCRIPTION_MODEL,
+            chunk_seconds=TRANSCRIPTION_CHUNK_SECONDS or transcription.CHUNK_SECONDS,
+            max_workers=TRANSCRIPTION_WORKERS,
+            cancel_event=cancel_event,
+            executor=executor
+        )
 
-def get_transcript(video_path):
-    with VideoFileClip(video_path) as video:
-        audio_temp_dir = tempfile.mkdtemp()
-        audio_path = os.path.join(audio_temp_dir, secure_filename(f'audio.wav'))
-        print("audiopath")
-        video.audio.write_audiofile(audio_path)
-
-        # Use a context manager to ensure the file is closed after use
-        with open(audio_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
-                file=audio_file,
-                model="whisper-1",
-                response_format="verbose_json",
-                timestamp_granularities=["word"]
-            )
+    if cancel_event is not None and cancel_event.is_set():
+        raise PreprocessCancelled("Transcription cancelled")
 
-        sec_transcription = [[] for _ in range(math.ceil(transcript.duration))]
+    return transcription.bucket_words(words, duration)
 
-        for word in transcript.words:
-            for sec in range(int(word.start), math.ceil(word.end)):
-                sec_transcription[sec].append(word.word)
+def _timed(timings, stage, fn, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[stage] = round(time.perf_counter() - start, 3)
+        metrics.record('preprocess_stage', timings[stage], stage=stage)
 
-        for sec in range(len(sec_transcription)):
-            sec_transcription[sec] = ' '.join(sec_transcription[sec])
-        
-        os.remove(audio_path)
-        os.rmdir(audio_temp_dir)
-        return sec_transcription[1:-1] 
-    # This is because there is not really a message at 0 and last frame.. that should also be in the 1st and 2nd last timestamp
+def run_preprocess(video_duration, spool, options=None, cancel_event=None, on_frame=None, lane=None):
+    """
+    Run frame description and transcription as parallel stages. The first stage to
+    fail cancels the other and its exception is re-raised. Returns the result and a
+    report with the wall time of each stage in seconds and the frame stage's stats.
+    With a work_queue lane, both stages send their model calls through it.
+    """
+    cancel_event = cancel_event or threading.Event()
+    timings = {}
+    frame_stats = {}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=2) as stage_executor:
+        image_future = stage_executor.submit(
+            metrics.bind(_timed), timings, 'frames', preprocess_image,
+            video_duration, spool.shared_path, options, cancel_event, on_frame, frame_stats, lane
+        )
+        transcript_future = stage_executor.submit(
+            metrics.bind(_timed), timings, 'transcription', get_transcript, spool.path, cancel_event, spool.pass_fds, lane
+        )
+
+        done, _ = wait([image_future, transcript_future], return_when=FIRST_EXCEPTION)
+        failed = [future for future in done if future.exception() is not None]
+        if failed:
+            # Leaving the with block waits for the other stage, so stop it first
+            cancel_event.set()
+            raise failed[0].exception()
+
+        image_desc, attrs = image_future.result()
+        transcription = transcript_future.result()
+
+    timings['total'] = round(time.perf_counter() - start, 3)
+    if timings.get('frames'):
+        frame_stats['frames_per_second'] = round(frame_stats['frames'] / timings['frames'], 2)
+    return {
+        'image_description': image_desc,
+        'image_attr': attrs,
+        'transcription': transcription
+    }, {'timings': timings, 'frames': frame_stats}
+
+def preprocess_video(video_duration, spool, options=None, cancel_event=None, on_frame=None, lane=None):
+    options = {**DEFAULT_PREPROCESS_OPTIONS, **(options or {})}
+    key = cache_key(
+        spool.content_hash,
+        vision_model=VISION_MODEL,
+        transcription_model=TRANSCRIPTION_MODEL,
+        # Other sample rates are mapped onto ceil(video_duration) seconds
+        seconds=math.ceil(video_duration) if options['interval'] != 1.0 else None,
+        **options
+    )
+    result = preprocess_cache.get(key)
+    # The client keeps content_hash on its clips so the retrieval index can be reused
+    report = {'cache_hit': result is not None, 'content_hash': key}
+
+    if result is None:
+        result, stage_report = run_preprocess(video_duration, spool, options, cancel_event, on_frame, lane)
+        preprocess_cache.put(key, result)
+        report.update(stage_report)
+        logger.info(f"Successfully finished preprocessing: {report}")
+    else:
+        logger.info("Preprocess cache hit")
+
+    return result, report
+
+def _read_preprocess_form():
+    video_duration = float(request.form.get('duration', 0))
+    options = {
+        'interval': sampling.sample_interval(
+            frames_per_second=request.form.get('sample_fps', type=float),
+            every_seconds=request.form.get('sample_every', type=float)
+        ),
+        'sampling_mode': request.form.get('sampling_mode', DEFAULT_PREPROCESS_OPTIONS['sampling_mode']),
+        'dedup_threshold': request.form.get('dedup_threshold', DEFAULT_PREPROCESS_OPTIONS['dedup_threshold'], type=int),
+        'scene_threshold': request.form.get('scene_threshold', DEFAULT_PREPROCESS_OPTIONS['scene_threshold'], type=float),
+        'max_gap': request.form.get('max_gap', DEFAULT_PREPROCESS_OPTIONS['max_gap'], type=float),
+        'vision_batch_size': request.form.get('vision_batch_size', DEFAULT_PREPROCESS_OPTIONS['vision_batch_size'], type=int),
+        'proxy_long_edge': request.form.get('proxy_long_edge', DEFAULT_PREPROCESS_OPTIONS['proxy_long_edge'], type=int),
+        'jpeg_quality': request.form.get('jpeg_quality', DEFAULT_PREPROCESS_OPTIONS['jpeg_quality'], type=int)
+    }
+    return video_duration, options
 
 @app.route('/api/preprocess', methods=['POST'])
 def preprocess():
     logger.info("Started processing")
     try:
-        video_duration = float(request.form.get('duration', 0))
+        video_duration, options = _read_preprocess_form()
         video_file = request.files.get('video')
 
         if not video_file:
             return jsonify({'error': 'No video file provided'}), 400
         
-        video_temp_dir = tempfile.mkdtemp()
-        video_path_preprocess = os.path.join(video_temp_dir, f"{secure_filename(video_file.name)}")
-        video_path_transcript = os.path.join(video_temp_dir, f"transcript_{secure_filename(video_file.name)}")
-        video_file.save(video_path_preprocess)
+        with ingest.spool_upload(video_file) as spool:
+            result, report = preprocess_video(video_duration, spool, options)
+
+        return jsonify({**format_result(result, result_format()), 'report': report})
 
-        image_desc, attrs = preprocess_image(video_duration, video_path_preprocess)
-        transcription = get_transcript(video_path_preprocess)
+    except Exception as e:
+        logger.error(f"Error in chat endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
-        os.remove(video_path_preprocess)
-        os.rmdir(video_temp_dir)
+def result_format():
+    # 'columnar' via a format field/argument or Accept: application/vnd.gencut.columnar+json
+    if 'application/vnd.gencut.columnar+json' in request.headers.get('Accept', ''):
+        return 'columnar'
+    return request.values.get('format', 'json')
 
-        logger.info("Successfully finished preprocessing")
+def format_result(result, output_format='json'):
+    # Columnar results carry attributes as float32 columns and are what prepare_context also accepts
+    if output_format == 'columnar':
+        return columnar.encode_result(result)
+    return result
 
+def _preprocess_batch_item(index, name, video_duration, spool, options, output_format='json'):
+    lane = model_queue.lane(name)
+    try:
+        result, report = preprocess_video(video_duration, spool, options, lane=lane)
+        return {'index': index, 'filename': name, **format_result(result, output_format), 'report': report}
+    except Exception as e:
+        # Drop this video's queued model calls so they don't hold up the other lanes
+        lane.shutdown(cancel_futures=True)
+        logger.error(f"Error preprocessing batch video {name}: {str(e)}")
+        return {'index': index, 'filename': name, 'error': str(e)}
+    finally:
+        spool.close()
+
+def iter_preprocess_batch(items, options, output_format='json'):
+    """
+    Preprocess (video_duration, name, spool) items side by side and yield one
+    entry per video as it completes. All their model calls go through the shared
+    model_queue, so the videos progress at the same pace.
+    """
+    pool = ThreadPoolExecutor(max_workers=max(1, min(len(items), BATCH_PIPELINES)))
+    try:
+        futures = [
+            pool.submit(metrics.bind(_preprocess_batch_item), index, name, video_duration, spool, options, output_format)
+            for index, (video_duration, name, spool) in enumerate(items)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        for _, _, spool in items:
+            spool.close()
+
+@app.route('/api/preprocess/batch', methods=['POST'])
+def preprocess_batch():
+    """
+    Several videos in one request: `videos` files with matching `duration`
+    fields. With stream=true the response is NDJSON, one line per video in
+    completion order; otherwise all results come back at once in upload order.
+    """
+    try:
+        _, options = _read_preprocess_form()
+        video_files = request.files.getlist('videos')
+        if not video_files:
+            return jsonify({'error': 'No video files provided'}), 400
+
+        durations = request.form.getlist('duration', type=float)
+        durations += [0.0] * (len(video_files) - len(durations))
+        items = [
+            (video_duration, video_file.filename or f"video_{index}", ingest.spool_upload(video_file))
+            for index, (video_duration, video_file) in enumerate(zip(durations, video_files))
+        ]
+        start = time.perf_counter()
+        output_format = result_format()
+
+        if request.form.get('stream', 'false').lower() == 'true':
+            def lines():
+                for entry in iter_preprocess_batch(items, options, output_format):
+                    yield json.dumps(entry) + '\n'
+            return Response(lines(), mimetype='application/x-ndjson')
+
+        results = sorted(iter_preprocess_batch(items, options, output_format), key=lambda entry: entry['index'])
         return jsonify({
-            'image_description': image_desc,
-            'image_attr': attrs,
-            'transcription': transcription
+            'results': results,
+            'report': {'total': round(time.perf_counter() - start, 3), 'queue': model_queue.stats()}
         })
 
     except Exception as e:
-        logger.error(f"Error in chat endpoint: {str(e)}")
+        logger.error(f"Error in batch preprocess: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/preprocess/jobs', methods=['POST'])
+def submit_preprocess_job():
+    try:
+        video_duration, options = _read_preprocess_form()
+        video_file = request.files.get('video')
+
+        if not video_file:
+            return jsonify({'error': 'No video file provided'}), 400
+
+        spool = ingest.spool_upload(video_file)
+
+        def run(job):
+            return preprocess_video(
+                video_duration, spool, options,
+                cancel_event=job.cancel_event, on_frame=job.record_frame
+            )
+
+        expected_frames = math.ceil(video_duration / options['interval']) if video_duration else None
+        try:
+            job = job_manager.submit(
+                metrics.bind(run),
+                expected_frames=expected_frames,
+                interval=options['interval'],
+                cleanup=spool.close
+            )
+        except jobs.QueueFull as e:
+            spool.close()
+            return jsonify({'error': f"Preprocess queue is full: {str(e)}"}), 429
+
+        logger.info(f"Queued preprocess job {job.job_id}")
+        return jsonify(job.status_dict()), 202
+
+    except Exception as e:
+        logger.error(f"Error submitting preprocess job: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/preprocess/jobs/<job_id>', methods=['GET'])
+def preprocess_job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.status_dict())
+
+@app.route('/api/preprocess/jobs/<job_id>/results', methods=['GET'])
+def preprocess_job_results(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    results = job.results_dict()
+    if result_format() == 'columnar':
+        results = {**results, **columnar.encode_result(results)}
+    return jsonify(results)
+
+@app.route('/api/preprocess/jobs/<job_id>/events', methods=['GET'])
+def stream_preprocess_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    def events():
+        # Server-sent events: one status message per change until the job ends
+        last = None
+        while True:
+            status = job.status_dict()
+            if status != last:
+                yield f"data: {json.dumps(status)}\n\n"
+                last = status
+            if job.done:
+                break
+            time.sleep(0.5)
+
+    return Response(events(), mimetype='text/event-stream')
+
+@app.route('/api/preprocess/jobs/<job_id>', methods=['DELETE'])
+def cancel_preprocess_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.status_dict())
+
+@app.route('/api/render', methods=['POST'])
+def render_video():
+    try:
+        video_file = request.files.get('video')
+        if not video_file:
+            return jsonify({'error': 'No video file provided'}), 400
+
+        # Same shape as the executor's calls: [{"function_name": ..., "function_args": ...}]
+        operations = json.loads(request.form.get('operations', '[]'))
+        if not operations:
+            return jsonify({'error': 'No operations provided'}), 400
+
+        render.remove_expired(RENDER_DIR, RENDER_TTL)
+        with ingest.spool_upload(video_file) as spool:
+            outputs = render.render(spool.path, operations, RENDER_DIR, spool.pass_fds)
+
+        for output in outputs:
+            output['url'] = f"/api/render/{output['output_id']}"
+        return jsonify({'outputs': outputs})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error rendering video: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/render/<output_id>', methods=['GET'])
+def get_render(output_id):
+    if not os.path.isfile(os.path.join(RENDER_DIR, os.path.basename(output_id))):
+        return jsonify({'error': 'Unknown render'}), 404
+    mimetype = 'video/webm' if output_id.endswith('.webm') else 'video/mp4'
+    return send_from_directory(RENDER_DIR, os.path.basename(output_id), mimetype=mimetype)
+
+@app.route('/api/disfluency', methods=['POST'])
+def detect_disfluency():
+    """
+    Trim candidates for repeated words, fillers, long gaps and dead air, found
+    locally. Takes the video (for the audio envelope) and/or `words`, the
+    transcript's word timings as JSON; without `words` the audio is transcribed.
+    """
+    try:
+        video_file = request.files.get('video')
+        words = json.loads(request.form['words']) if 'words' in request.form else None
+        duration = request.form.get('duration', type=float)
+
+        if video_file is None and words is None:
+            return jsonify({'error': 'Provide a video file or word timings'}), 400
+
+        samples = None
+        if video_file is not None:
+            with ingest.spool_upload(video_file) as spool:
+                samples = transcription.load_audio(spool.path, pass_fds=spool.pass_fds)
+            if words is None:
+                words, _ = transcription.transcribe_chunked(
+                    client, samples, TRANSCRIPTION_MODEL,
+                    chunk_seconds=TRANSCRIPTION_CHUNK_SECONDS or transcription.CHUNK_SECONDS,
+                    max_workers=TRANSCRIPTION_WORKERS
+                )
+
+        return jsonify(disfluency.detect(words, samples, duration=duration))
+
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f"Invalid word timings: {str(e)}"}), 400
+    except Exception as e:
+        logger.error(f"Error detecting disfluencies: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 def formatTime(seconds):
@@ -209,9 +757,108 @@ def formatTime(seconds):
 def check_health():
     return jsonify({'healthy': 'true'})
 
-def request_for_plan(clip_contexts, messages):
+@app.before_request
+def start_trace():
+    # Callers may pass their own X-Trace-Id to correlate requests
+    g.trace_id = request.headers.get('X-Trace-Id') or metrics.new_trace_id()
+    g.trace_token = metrics.start_trace(g.trace_id)
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def finish_trace(response):
+    trace_id = g.get('trace_id')
+    if trace_id is not None:
+        response.headers['X-Trace-Id'] = trace_id
+        metrics.record(
+            'http_request', time.perf_counter() - g.request_start,
+            endpoint=request.endpoint or 'unknown', method=request.method, status=str(response.status_code)
+        )
+    return response
+
+@app.teardown_request
+def end_trace(_):
+    token = g.pop('trace_token', None)
+    if token is not None:
+        try:
+            metrics.end_trace(token)
+        except ValueError:
+            # Streamed responses can finish in a different context
+            pass
+
+@app.after_request
+def add_response_cache_header(response):
+    if g.get('use_response_cache') is not None:
+        response.headers['X-Response-Cache'] = f"hits={g.get('response_cache_hits', 0)}" if g.use_response_cache else 'bypass'
+    return response
+
+@app.after_request
+def compress_response(response):
+    # gzip/brotli for larger JSON bodies, negotiated from Accept-Encoding; streams and files pass through
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or 'Content-Encoding' in response.headers or response.mimetype != 'application/json'):
+        return response
+    encoding = columnar.negotiate_encoding(request.headers.get('Accept-Encoding'))
+    data = response.get_data()
+    if encoding is None or len(data) < columnar.MIN_COMPRESS_BYTES:
+        return response
+    response.set_data(columnar.compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    # Histograms and counters of stage timings and model calls; ?format=prometheus for text exposition
+    if request.args.get('format') == 'prometheus':
+        return Response(metrics.registry.prometheus(), mimetype='text/plain; version=0.0.4')
+    return jsonify(metrics.registry.snapshot())
+
+@app.route('/api/metrics/traces/<trace_id>', methods=['GET'])
+def get_trace(trace_id):
+    spans = metrics.registry.trace(trace_id)
+    if spans is None:
+        return jsonify({'error': 'Unknown trace'}), 404
+    return jsonify({'trace_id': trace_id, 'spans': spans})
+
+@app.route('/api/preprocess/cache', methods=['GET'])
+def preprocess_cache_stats():
+    return jsonify(preprocess_cache.stats())
+
+@app.route('/api/models/stats', methods=['GET'])
+def model_stats():
+    return jsonify(model_scheduler.stats())
+
+@app.route('/api/models/cache', methods=['GET'])
+def response_cache_stats():
+    return jsonify(response_cache.stats())
+
+def create_completion(model_client, **kwargs):
+    """
+    chat.completions.create through the response cache. Skipped when the cache is
+    off or the request opted out (g.use_response_cache).
+    """
+    if not RESPONSE_CACHE_TTL or not g.get('use_response_cache', True):
+        return model_client.chat.completions.create(**kwargs)
+
+    response, hit, latency = response_cache.get_or_call(
+        kwargs, lambda: model_client.chat.completions.create(**kwargs)
+    )
+    model = str(kwargs.get('model'))
+    if hit:
+        metrics.registry.increment('response_cache_hits_total', model=model)
+        metrics.registry.increment('response_cache_latency_saved_seconds_total', latency, model=model)
+        g.response_cache_hits = g.get('response_cache_hits', 0) + 1
+    else:
+        metrics.registry.increment('response_cache_misses_total', model=model)
+    return response
+
+def request_for_plan(clip_contexts, messages, execution='step'):
+    user_messages = [msg['content'] for msg in messages if msg['role'] == 'user']
+    annotated_context = prepare_context(clip_contexts, user_messages[-1] if user_messages else None)
 
-    # Prepare the messages to send to GPT
+    # Prepare the messages to send to GPT. The clip context is focused on the
+    # latest user message, so it goes last; the conversation before it is the
+    # part each turn shares with the previous one
     formatted_messages = [{
         "role": "system",
         "content": f"You are the planner of an ai agent for video editing. You will be giving tasks to an editor. {AVAILABLE_TASK_FUNCTIONS['create_task']['description']}. IF YOU WANT TO REPLY TO THE USER START YOUR MESSAGE WITH 'MESSAGE'. IF YOU WANT TO SEND STEPS, START YOUR MESSAGE WITH 'STEPS'. YOU SHOULD REPLY ONLY WITH EACH STEP ON A DIFFERENT LINE AND NOTHING ELSE. "
@@ -225,10 +872,10 @@ def request_for_plan(clip_contexts, messages):
 
     formatted_messages.append({
         "role": "user",
-        "content": f"here is the context for all my videos: {clip_contexts}"
+        "content": f"here is the context for all my videos: {annotated_context}"
     })
 
-    print(formatted_messages)
+    logger.debug(formatted_messages)
 
     # # Call GPT (with function_call enabled)
     # response = client.chat.completions.create(
@@ -239,12 +886,13 @@ def request_for_plan(clip_contexts, messages):
     # )
 
     # Call GPT (with function_call enabled)
-    response = gemini_client.chat.completions.create(
+    response = create_completion(
+        gemini_client,
         model="gemini-2.0-flash-thinking-exp",
         messages=formatted_messages
     )
 
-    print(response)
+    logger.debug(response)
 
     response = response.choices[0].message
 
@@ -256,10 +904,8 @@ def request_for_plan(clip_contexts, messages):
         })
     elif response.content.startswith("STEPS"):
         clean_steps = response.content.split('\n')[1:]
-        global task_id
-        task_id += 1
 
-        return create_task(task_id, clean_steps, clip_contexts)
+        return create_task(clean_steps, clip_contexts, execution)
 
     # if hasattr(response, 'function_call') and response.function_call:
     #     func_call = response.function_call
@@ -289,74 +935,122 @@ def request_for_plan(clip_contexts, messages):
 def reasoning_chat():
     try:
 
-        data = request.get_json()
+        data = request_json()
+        # "cache": false (or Cache-Control: no-cache) always asks the model, e.g. to get a different plan
+        g.use_response_cache = data.get('cache', True) is not False and 'no-cache' not in request.headers.get('Cache-Control', '')
         request_type = data['type']
-        clip_contexts = prepare_context(data.get('clipContexts', []))
+        clip_contexts = data.get('clipContexts', [])
         if request_type == 'new_chat':
             messages = data.get('messages', [])
-            return request_for_plan(clip_contexts, messages)
+            # 'batch' resolves every planned step in one executor call instead of one per continue_task
+            return request_for_plan(clip_contexts, messages, data.get('execution', 'step'))
         elif request_type == 'continue_task':
           task_id = data['task_id']
           return continue_task(task_id, clip_contexts)
 
+    except columnar.PayloadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
     except Exception as e:
         logger.error(e)
 
-def create_task(task_id, steps, clip_contexts):
-    global tasks
+def create_task(steps, clip_contexts, execution='step'):
+    task = task_store.create(steps)
+    logger.debug(task)
 
-    task = {
-        "task_id": task_id,
-        "steps": steps,
-        "current_step": -1
-    }
-    print(task)
-
-    tasks[task_id] = task
+    task_id = task["task_id"]
+    if execution == 'batch':
+        return execute_task_batch(task_id, clip_contexts)
     return continue_task(task_id, clip_contexts)
 
-def prepare_context(contexts):
-    annotated_context = []
-    for context in contexts:
-        annotations = {
-            "imageDescriptions": [f"second {i + 1}: {desc}" for i, desc in enumerate(context.get("imageDescriptions", []))],
-            "imageAttributes": [f"second {i + 1}: {attr}" for i, attr in enumerate(context.get("imageAttributes", []))],
-            "transcription": [f"second {i + 1}: {trans}" for i, trans in enumerate(context.get("transcription", []))],
-            "mediaId": context.get("mediaId", "unknown"),
-            "duration": context.get("duration", 0),
-            "start": context.get("start", 0),
-            "clip_id": context.get("clip_id", "unknown")  # Added clip id
-        }
-        annotated_context.append(annotations)
+def execute_task_batch(task_id, clip_contexts):
+    steps = task_store.get(task_id)['steps']
+    # The focused clip context goes last so the tool schemas and system prompt
+    # stay an identical prefix across tasks
+    formatted_messages = [{
+        "role": "system",
+        "content": batch_execution.BATCH_EXECUTOR_PROMPT
+    }, {
+        "role": "user",
+        "content": f"Here are the steps:\n{batch_execution.format_steps(steps)}"
+    }, {
+        "role": "user",
+        "content": f"here is the context for all my videos: {prepare_context(clip_contexts, ' '.join(steps))}"
+    }]
+
+    logger.debug(formatted_messages)
+
+    response = create_completion(
+        client,
+        model="gpt-4o",
+        messages=formatted_messages,
+        tools=[{"type": "function", "function": function} for function in EXECUTOR_FUNCTIONS],
+        tool_choice="auto",
+        parallel_tool_calls=True
+    )
+    assistant_message = response.choices[0].message
+    task_store.set_current_step(task_id, len(steps))
+
+    if not assistant_message.tool_calls:
+        return jsonify({
+            "type": "message",
+            "message": assistant_message.content
+        })
 
-    return str(annotated_context)
+    return jsonify({
+        "type": "function_calls",
+        "calls": batch_execution.resolve_calls(assistant_message.tool_calls, clip_contexts, steps),
+        "task_id": task_id
+    })
+
+def request_json():
+    # JSON body, gzip or brotli compressed when the client sets Content-Encoding
+    encoding = request.headers.get('Content-Encoding')
+    if encoding:
+        return columnar.read_json(request.get_data(), encoding, REQUEST_BODY_MAX_BYTES)
+    return request.get_json()
+
+def prepare_context(contexts, query=None):
+    # Clip contexts may hold columnar preprocess results
+    contexts = columnar.normalize_contexts(contexts)
+    # With a query, only the clips and seconds the retrieval index finds relevant are sent in full
+    with metrics.span('chat_context') as span:
+        focus = context_indexes.get(contexts).focus(query) if query else None
+        annotated_context, stats = clip_context.build_context(contexts, CONTEXT_TOKEN_BUDGET, focus)
+        span['tokens'] = stats['tokens']
+    g.context_stats = stats
+    logger.info(f"Context tokens: {stats}")
+    return annotated_context
+
+@app.after_request
+def add_context_stats(response):
+    stats = g.get('context_stats')
+    if stats is not None:
+        response.headers['X-Context-Tokens'] = f"{stats['tokens']}; legacy={stats['legacy_tokens']}; saved={stats['tokens_saved']}"
+    return response
 
 def continue_task(task_id, clip_contexts):
-    global tasks
-    
-    tasks[task_id]["current_step"] += 1
-    curr_step = tasks[task_id]["current_step"] 
+    task_state = task_store.advance(task_id)
+    if task_state is None:
+        return jsonify({'error': f"Unknown or expired task {task_id}"}), 404
 
-    if curr_step == len(tasks[task_id]['steps']):
+    steps = task_state['steps']
+    curr_step = task_state["current_step"]
+
+    if curr_step >= len(steps):
         return jsonify({
             "type": "task_end",
         })
 
-    task = tasks[task_id]['steps'][curr_step]
+    task = steps[curr_step]
     formatted_messages = [{
         "role": "system",
         "content": "You are the executor of an ai agent system for editing videos. You have available functions to edit videos and will be given the context of the each video in the timeline of the editor. You will also be given a list of steps and the current step we are on. ONLY execute the step you are currently on."
     }]
 
-    formatted_messages.append({
-        "role": "user",
-        "content": f"here is the context for all my videos: {clip_contexts}"
-    })
-
     previous_steps = "-------previous steps"
 
     for i in range(curr_step):
-        previous_steps += f"{i + 1}. {tasks[task_id]['steps'][i]}\n"
+        previous_steps += f"{i + 1}. {steps[i]}\n"
     previous_steps += "\n-------------------------------"
 
     formatted_messages.append({
@@ -369,24 +1063,21 @@ def continue_task(task_id, clip_contexts):
         "content": f"Here is the current step: {task}"
     })
 
-    print(formatted_messages)
+    # The clip context is focused on the current step, so it goes last; the
+    # function schemas, system prompt and earlier steps before it are shared
+    # by every step of the task
+    formatted_messages.append({
+        "role": "user",
+        "content": f"here is the context for all my videos: {prepare_context(clip_contexts, task)}"
+    })
 
-    response = client.chat.completions.create(
+    logger.debug(formatted_messages)
+
+    response = create_completion(
+        client,
         model="gpt-4o",
         messages=formatted_messages,
-        functions=[AVAILABLE_FUNCTIONS['cutClip'], 
-                       AVAILABLE_FUNCTIONS['moveClip'], 
-                       AVAILABLE_FUNCTIONS['adjustBrightness'], 
-                       AVAILABLE_FUNCTIONS['trim_video'], 
-                       AVAILABLE_FUNCTIONS['deleteClip'],
-                       AVAILABLE_FUNCTIONS['convertToGrayscale'],
-                       AVAILABLE_FUNCTIONS['applyColorGrading'],
-                       AVAILABLE_FUNCTIONS['adjustSaturation'],
-                       AVAILABLE_FUNCTIONS['addBlurEffect'],
-                       AVAILABLE_FUNCTIONS['applyFadeIn'],
-                       AVAILABLE_FUNCTIONS['applyFadeOut']
-
-                       ],
+        functions=EXECUTOR_FUNCTIONS,
         function_call="auto",
     )
     assistant_message = response.choices[0].message
@@ -410,6 +1101,31 @@ def continue_task(task_id, clip_contexts):
 # Ensure to shut down the executor when the application is stopped
 atexit.register(executor.shutdown)
 
+def warm_up():
+    """
+    Load the lazily imported media modules and build the model clients now
+    rather than on first use. Returns the seconds each one took.
+    """
+    timings = lazy.preload(utils, sampling, transcription, proxy, render, disfluency)
+    for name, model_client in (('openai_client', client), ('gemini_client', gemini_client)):
+        start = time.perf_counter()
+        try:
+            model_client.client
+        except Exception as e:
+            logger.warning(f"Could not build {name} during warm-up: {str(e)}")
+            continue
+        timings[name] = round(time.perf_counter() - start, 4)
+    logger.info(f"Warm-up finished: {timings}")
+    return timings
+
+# WARM_UP=1 warms up at import (e.g. in a gunicorn --preload master before forking),
+# WARM_UP=background does it in a thread so the server starts answering right away
+WARM_UP = os.getenv('WARM_UP', '')
+if WARM_UP == 'background':
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+elif WARM_UP:
+    warm_up()
+
 if __name__ == '__main__':
     logger.info("Starting Flask server...")
     app.run(host='0.0.0.0', port=5050, debug=True)
\ No newline at end of file
@@ -0,0 +1,74 @@
+import json
+
+# Cutting clip X replaces it with clips "X.1" (before the cut) and "X.2" (after)
+CUT_SUFFIXES = (".1", ".2")
+
+BATCH_EXECUTOR_PROMPT = (
+    "You are the executor of an ai agent system for editing videos. You have available functions to edit videos "
+    "and will be given the context of each video in the timeline of the editor and a numbered list of steps. "
+    "Execute ALL of the steps by calling exactly one function per step, in the same order as the steps. "
+    "Cutting a clip with id X replaces it with two clips: 'X" + CUT_SUFFIXES[0] + "' is the part before the cut and 'X"
+    + CUT_SUFFIXES[1] + "' the part after it. Use those ids in any later step that touches either part."
+)
+
+
+def cut_clip_ids(clip_id):
+    return [f"{clip_id}{suffix}" for suffix in CUT_SUFFIXES]
+
+
+def format_steps(steps):
+    return '\n'.join(f"{i + 1}. {step}" for i, step in enumerate(steps))
+
+
+def resolve_calls(tool_calls, clip_contexts, steps):
+    """
+    Turn the model's ordered tool calls into the list returned to the client,
+    replaying them on a minimal timeline so clips created by cutClip are known to
+    later calls. Each entry lists the clip ids it creates, and carries a warning
+    when it targets a clip that does not exist at that point.
+    """
+    clips = {
+        str(context.get("clip_id")): {
+            "start": float(context.get("start") or 0),
+            "duration": float(context.get("duration") or 0)
+        }
+        for context in clip_contexts
+    }
+    one_per_step = len(tool_calls) == len(steps)
+    calls = []
+
+    for i, tool_call in enumerate(tool_calls):
+        name = tool_call.function.name
+        arguments = tool_call.function.arguments
+        try:
+            args = json.loads(arguments)
+        except (TypeError, ValueError):
+            args = {}
+
+        entry = {
+            "function_name": name,
+            "function_args": arguments,
+            "message": steps[i] if one_per_step else None,
+            "creates": []
+        }
+
+        clip_id = args.get("clipId")
+        if clip_id is not None:
+            clip_id = str(clip_id)
+            if clip_id not in clips:
+                entry["warning"] = f"Clip {clip_id} does not exist at this point in the task"
+            elif name == "cutClip":
+                clip = clips.pop(clip_id)
+                cut_point = float(args.get("cutPoint") or 0)
+                before, after = cut_clip_ids(clip_id)
+                clips[before] = {"start": clip["start"], "duration": cut_point}
+                clips[after] = {"start": clip["start"] + cut_point, "duration": clip["duration"] - cut_point}
+                entry["creates"] = [before, after]
+            elif name == "deleteClip":
+                del clips[clip_id]
+            elif name == "moveClip":
+                clips[clip_id]["start"] = float(args.get("start") or 0)
+
+        calls.append(entry)
+
+    return calls
@@ -0,0 +1,66 @@
+"""
+Per-frame cost of the old four separate attribute calls against the fused
+extractor in utils.py, per frame and batched.
+
+    python benchmarks/bench_attributes.py [--width 1920 --height 1080 --frames 60]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+
+def legacy_attributes(frame):
+    # What preprocess_image computed per frame before get_frame_attributes
+    return {
+        "rgb_level": utils.get_rgb_levels(frame),
+        "saturation": utils.get_saturation(frame),
+        "contrast": utils.get_contrast(frame),
+        "brightness": utils.get_brightness(frame)
+    }
+
+
+def measure(name, run, frame_count, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<28} {best / frame_count * 1000:>10.3f} ms/frame")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--frames', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(args.frames)]
+    count = len(frames)
+
+    print(f"{count} frames at {args.width}x{args.height}")
+    baseline = measure('legacy (4 conversions)', lambda: [legacy_attributes(f) for f in frames], count, args.repeat)
+    legacy_full = measure('legacy + blur + grading', lambda: [
+        (legacy_attributes(f), utils.get_blur(f), utils.get_color_grading(f)) for f in frames
+    ], count, args.repeat)
+    fused = measure('fused per frame', lambda: [utils.get_frame_attributes(f) for f in frames], count, args.repeat)
+    batched = measure('fused batch', lambda: utils.get_batch_attributes(frames), count, args.repeat)
+    fused_full = measure('fused batch + blur + grading',
+                         lambda: utils.get_batch_attributes(frames, blur=True, color_grading=True), count, args.repeat)
+
+    print(f"speedup per frame: {baseline / fused:.1f}x, batched: {baseline / batched:.1f}x, "
+          f"with blur + grading: {legacy_full / fused_full:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
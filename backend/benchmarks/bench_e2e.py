@@ -0,0 +1,319 @@
+"""
+End-to-end benchmark of /api/preprocess and /api/chatv2 against local stub
+model servers, so no API keys or spend are needed.
+
+    python benchmarks/bench_e2e.py [--seconds 30 --width 1280 --height 720 --fps 30]
+                                   [--latency 0.3 --jitter 0.1 --error-rate 0.02]
+                                   [--preprocess-requests 4 --chat-requests 20 --concurrency 4]
+                                   [--output results.json]
+
+Synthetic videos (test pattern plus a tone) are generated with ffmpeg. The
+app runs in-process behind Flask's test client. Each stage reports throughput,
+p50/p95/p99 latency, error rate and peak RSS. --output writes the same
+numbers as JSON, together with the git commit, so runs can be compared across
+commits.
+
+The script exits with status 1 when a stage has no successful requests or
+fails more requests than --max-error-rate allows (by default the stub's
+--error-rate; the scheduler's retries should keep it well below that). The
+preprocess and model response caches are off unless --cache is given, so every
+request reaches the stub models.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from stub_models import StubModelServer
+from transcription import ffmpeg_exe
+
+
+def make_test_video(path, seconds, width, height, fps):
+    command = [
+        ffmpeg_exe(), '-nostdin', '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds}",
+        '-f', 'lavfi', '-i', f"sine=frequency=440:duration={seconds}",
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p', '-c:a', 'aac', '-shortest', path
+    ]
+    subprocess.run(command, check=True)
+
+
+def percentile(values, fraction):
+    # Nearest-rank percentile
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def current_rss():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # ru_maxrss is the peak so far (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if platform.system() == 'Darwin' else peak * 1024
+
+
+class RSSMonitor:
+    # Samples resident memory in the background; peak() is the highest value since reset()
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.value = current_rss()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.value = max(self.value, current_rss())
+
+    def reset(self):
+        self.value = current_rss()
+
+    def peak(self):
+        return max(self.value, current_rss())
+
+    def stop(self):
+        self.stopped.set()
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.wall = 0.0
+        self.peak_rss = 0
+
+    def error_rate(self):
+        requests = len(self.latencies) + self.errors
+        return self.errors / requests if requests else 0.0
+
+    def summary(self):
+        ok = len(self.latencies)
+        return {
+            "requests": ok + self.errors,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate(), 4),
+            "throughput_per_s": round(ok / self.wall, 3) if self.wall else None,
+            "p50_s": _round(percentile(self.latencies, 0.50)),
+            "p95_s": _round(percentile(self.latencies, 0.95)),
+            "p99_s": _round(percentile(self.latencies, 0.99)),
+            "peak_rss_mb": round(self.peak_rss / 2 ** 20, 1)
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 4)
+
+
+def run_stage(stage, monitor, count, concurrency, request_once):
+    # request_once() returns extra [(stage_name, latency)] samples or raises on failure
+    extra = {}
+    lock = threading.Lock()
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            samples = request_once() or []
+        except Exception as e:
+            print(f"  {stage.name} request failed: {e}")
+            with lock:
+                stage.errors += 1
+            return
+        elapsed = time.perf_counter() - start
+        with lock:
+            stage.latencies.append(elapsed)
+            for name, value in samples:
+                extra.setdefault(name, Stage(name)).latencies.append(value)
+
+    monitor.reset()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(count)))
+    stage.wall = time.perf_counter() - start
+    stage.peak_rss = monitor.peak()
+    for sub_stage in extra.values():
+        sub_stage.wall = stage.wall
+        sub_stage.peak_rss = stage.peak_rss
+    return [stage] + list(extra.values())
+
+
+def preprocess_request(client, video_path, seconds):
+    def run():
+        with open(video_path, 'rb') as video:
+            response = client.post('/api/preprocess', data={
+                'duration': str(seconds),
+                'video': (video, os.path.basename(video_path))
+            }, content_type='multipart/form-data')
+        body = response.get_json()
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code}: {body}")
+        timings = body.get('report', {}).get('timings', {})
+        return [(f"preprocess.{name}", value) for name, value in timings.items() if name != 'total']
+    return run
+
+
+def chat_request(client, clip_contexts, execution):
+    def post(payload):
+        response = client.post('/api/chatv2', json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return response.get_json()
+
+    def run():
+        samples = []
+        start = time.perf_counter()
+        reply = post({
+            'type': 'new_chat',
+            'execution': execution,
+            'clipContexts': clip_contexts,
+            'messages': [{'role': 'user', 'content': 'Make the first clip grayscale, brighter and fade it in'}]
+        })
+        samples.append(('chat.plan', time.perf_counter() - start))
+
+        if execution == 'batch':
+            # Every call comes back with the plan; anything else means the executor did nothing
+            if reply.get('type') != 'function_calls' or not reply.get('calls'):
+                raise RuntimeError(f"Expected function_calls, got {json.dumps(reply)[:200]}")
+            return samples
+
+        steps = 0
+        while reply.get('type') == 'function_call':
+            start = time.perf_counter()
+            reply = post({'type': 'continue_task', 'task_id': reply['task_id'], 'clipContexts': clip_contexts})
+            samples.append(('chat.step', time.perf_counter() - start))
+            steps += 1
+            if steps > 50:
+                raise RuntimeError("Task did not end")
+        if not steps or reply.get('type') != 'task_end':
+            raise RuntimeError(f"Expected function_call steps ending in task_end, got {json.dumps(reply)[:200]}")
+        return samples
+    return run
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--latency', type=float, default=0.3, help='stub seconds per model response')
+    parser.add_argument('--jitter', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--max-error-rate', type=float,
+                        help='highest fraction of failed requests per stage before exiting 1 (default: --error-rate)')
+    parser.add_argument('--preprocess-requests', type=int, default=4)
+    parser.add_argument('--chat-requests', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--execution', choices=('step', 'batch'), default='step')
+    parser.add_argument('--cache', action='store_true', help='keep the preprocess and model response caches enabled')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+    max_error_rate = args.error_rate if args.max_error_rate is None else args.max_error_rate
+    failed = []
+
+    temp_dir = tempfile.mkdtemp()
+    stub = StubModelServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate).start()
+    monitor = RSSMonitor()
+    try:
+        # The app reads these at import time
+        os.environ.update({
+            'OPENAI_API_KEY': 'stub', 'GEMINI_API_KEY': 'stub',
+            'OPENAI_BASE_URL': stub.url, 'GEMINI_BASE_URL': stub.url,
+            'PREPROCESS_CACHE_DIR': os.path.join(temp_dir, 'cache'),
+            'TASK_STORE': 'memory'
+        })
+        if not args.cache:
+            os.environ['PREPROCESS_CACHE_MAX_BYTES'] = '0'
+            # Repeated chat requests are identical; cached replies would skip the stub entirely
+            os.environ['RESPONSE_CACHE_TTL'] = '0'
+
+        video_path = os.path.join(temp_dir, 'synthetic.mp4')
+        make_test_video(video_path, args.seconds, args.width, args.height, args.fps)
+
+        import_start = time.perf_counter()
+        import app as backend
+        import_seconds = time.perf_counter() - import_start
+        client = backend.app.test_client()
+
+        print(f"video: {args.seconds}s {args.width}x{args.height} @ {args.fps} fps; stub latency "
+              f"{args.latency}s ±{args.jitter}, error rate {args.error_rate}")
+
+        preprocess_stages = run_stage(Stage('preprocess'), monitor, args.preprocess_requests, args.concurrency,
+                                      preprocess_request(client, video_path, args.seconds))
+
+        clip_contexts = [{
+            'clip_id': '1', 'start': 0, 'duration': args.seconds,
+            'imageDescriptions': ['Stub description: a test pattern with colour bars.'] * int(args.seconds),
+            'transcription': ['so today we are going'] * int(args.seconds),
+            'imageAttributes': []
+        }]
+        chat_stages = run_stage(Stage('chat.conversation'), monitor, args.chat_requests, args.concurrency,
+                                chat_request(client, clip_contexts, args.execution))
+        stages = preprocess_stages + chat_stages
+
+        for stage in (preprocess_stages[0], chat_stages[0]):
+            requests = len(stage.latencies) + stage.errors
+            if requests and (not stage.latencies or stage.error_rate() > max_error_rate):
+                failed.append(f"{stage.name}: {stage.errors}/{requests} requests failed")
+
+        results = {
+            "commit": git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "config": vars(args),
+            "max_error_rate": max_error_rate,
+            "failed": failed,
+            "app_import_s": round(import_seconds, 3),
+            "stages": {stage.name: stage.summary() for stage in stages},
+            "stub": stub.stats()
+        }
+
+        print(f"{'stage':<28} {'n':>5} {'err':>4} {'req/s':>8} {'p50 (s)':>9} {'p95 (s)':>9} "
+              f"{'p99 (s)':>9} {'peak RSS MB':>12}")
+        for name, summary in results["stages"].items():
+            print(f"{name:<28} {summary['requests']:>5} {summary['errors']:>4} "
+                  f"{summary['throughput_per_s'] or 0:>8.2f} {summary['p50_s'] or 0:>9.3f} "
+                  f"{summary['p95_s'] or 0:>9.3f} {summary['p99_s'] or 0:>9.3f} {summary['peak_rss_mb']:>12.1f}")
+
+        if args.output:
+            with open(args.output, 'w') as output:
+                json.dump(results, output, indent=2)
+            print(f"wrote {args.output}")
+    finally:
+        monitor.stop()
+        stub.stop()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    if failed:
+        print(f"FAILED (max error rate {max_error_rate}): " + "; ".join(failed), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
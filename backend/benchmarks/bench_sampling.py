@@ -0,0 +1,104 @@
+"""
+Compare the old read-every-frame loop from preprocess_image against the
+sampling engine in sampling.py.
+
+    python benchmarks/bench_sampling.py [video_path] [--fps 30] [--seconds 60]
+
+Without a video path a synthetic clip is written to a temp dir first.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sampling
+
+
+def make_synthetic_video(path, seconds, fps, width=1280, height=720):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for i in range(int(seconds * fps)):
+        frame = np.roll(base, i * 4, axis=1)
+        cv2.putText(frame, str(i), (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        writer.write(frame)
+    writer.release()
+
+
+def legacy_loop(video_path):
+    # The loop preprocess_image used before sampling.py
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = 0
+    sampled = 0
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_count % int(fps) == 0:
+            sampled += 1
+        frame_count += 1
+    cap.release()
+    return sampled
+
+
+def sampler(mode, interval):
+    def run(video_path):
+        return sum(1 for _ in sampling.iter_sampled_frames(video_path, interval, mode))
+    return run
+
+
+def measure(name, fn, video_path, video_seconds, repeat):
+    best = float('inf')
+    sampled = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sampled = fn(video_path)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<16} {sampled:>8} {best:>9.3f} {sampled / best:>12.1f} {video_seconds / best:>14.1f}")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('video', nargs='?')
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    temp_dir = None
+    video_path = args.video
+    try:
+        if not video_path:
+            temp_dir = tempfile.mkdtemp()
+            video_path = os.path.join(temp_dir, 'synthetic.mp4')
+            make_synthetic_video(video_path, args.seconds, args.fps)
+
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        video_seconds = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps if fps else 0
+        cap.release()
+
+        print(f"video: {video_path} ({video_seconds:.1f}s @ {fps:.2f} fps), interval {args.interval}s")
+        print(f"{'method':<16} {'sampled':>8} {'wall (s)':>9} {'samples/s':>12} {'video s/wall s':>14}")
+
+        baseline = measure('legacy read()', legacy_loop, video_path, video_seconds, args.repeat)
+        for mode in ('grab', 'seek'):
+            elapsed = measure(f'sampler {mode}', sampler(mode, args.interval), video_path, video_seconds, args.repeat)
+            print(f"{'':<16} speedup vs legacy: {baseline / elapsed:.2f}x")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Measure how segmented multi-process decoding scales with the worker count,
+against the single-capture sampler.
+
+    python benchmarks/bench_segmented.py [video_path] [--seconds 300] [--workers 1,2,4,8]
+
+Without a video path a synthetic clip is written to a temp dir first. Worker
+counts default to powers of two up to the number of cores.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sampling
+from bench_sampling import make_synthetic_video
+
+
+def default_worker_counts():
+    counts = []
+    count = 1
+    while count < (os.cpu_count() or 1):
+        counts.append(count)
+        count *= 2
+    return counts + [os.cpu_count() or 1]
+
+
+def run_serial(video_path, interval, long_edge):
+    return sum(1 for _ in sampling.iter_sampled_frames(video_path, interval, 'grab'))
+
+
+def run_segmented(video_path, interval, long_edge, workers):
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        # Start the workers before timing so interpreter startup isn't measured
+        list(pool.map(abs, range(workers)))
+        start = time.perf_counter()
+        sampled = sum(1 for _ in sampling.iter_segmented_frames(video_path, interval, pool, workers, long_edge))
+        return sampled, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('video', nargs='?')
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--seconds', type=float, default=300)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--long-edge', type=int, default=768)
+    parser.add_argument('--workers', help='comma separated worker counts')
+    args = parser.parse_args()
+
+    worker_counts = [int(n) for n in args.workers.split(',')] if args.workers else default_worker_counts()
+
+    temp_dir = None
+    video_path = args.video
+    try:
+        if not video_path:
+            temp_dir = tempfile.mkdtemp()
+            video_path = os.path.join(temp_dir, 'synthetic.mp4')
+            make_synthetic_video(video_path, args.seconds, args.fps)
+
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        video_seconds = cap.get(cv2.CAP_PROP_FRAME_COUNT) / fps if fps else 0
+        cap.release()
+
+        print(f"video: {video_path} ({video_seconds:.1f}s @ {fps:.2f} fps), interval {args.interval}s, "
+              f"{os.cpu_count()} cores")
+        print(f"{'method':<16} {'sampled':>8} {'wall (s)':>9} {'video s/wall s':>14} {'speedup':>8}")
+
+        start = time.perf_counter()
+        sampled = run_serial(video_path, args.interval, args.long_edge)
+        baseline = time.perf_counter() - start
+        print(f"{'serial grab':<16} {sampled:>8} {baseline:>9.3f} {video_seconds / baseline:>14.1f} {1.0:>7.2f}x")
+
+        for workers in worker_counts:
+            sampled, elapsed = run_segmented(video_path, args.interval, args.long_edge, workers)
+            print(f"{f'segmented x{workers}':<16} {sampled:>8} {elapsed:>9.3f} "
+                  f"{video_seconds / elapsed:>14.1f} {baseline / elapsed:>7.2f}x")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Startup cost of the backend: cold `import app` and time from process start
+to the first successful /api/health, each in fresh processes.
+
+    python benchmarks/bench_startup.py [--runs 5] [--warm-up none,1,background] [--output startup.json]
+
+Every run starts a new interpreter so nothing is cached in-process. The
+--warm-up values are passed as WARM_UP; "none" leaves it unset.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = """
+import json
+import time
+start = time.perf_counter()
+import app
+import lazy
+print(json.dumps({"import_s": time.perf_counter() - start, "lazy_loaded": sorted(lazy.load_times)}))
+"""
+
+SERVE_SCRIPT = """
+import sys
+import app
+from werkzeug.serving import make_server
+make_server('127.0.0.1', int(sys.argv[1]), app.app, threaded=True).serve_forever()
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def environment(warm_up):
+    env = dict(os.environ)
+    env.setdefault('OPENAI_API_KEY', 'bench')
+    env.setdefault('GEMINI_API_KEY', 'bench')
+    env.pop('WARM_UP', None)
+    if warm_up != 'none':
+        env['WARM_UP'] = warm_up
+    return env
+
+
+def cold_import(warm_up):
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORT_SCRIPT], cwd=BACKEND_DIR, env=environment(warm_up),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def first_health(warm_up, timeout=60):
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-c', SERVE_SCRIPT, str(port)], cwd=BACKEND_DIR, env=environment(warm_up),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError("Server exited before answering /api/health")
+                time.sleep(0.005)
+        raise TimeoutError("No /api/health answer")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(values):
+    return {
+        "median_s": round(statistics.median(values), 4),
+        "min_s": round(min(values), 4),
+        "max_s": round(max(values), 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--warm-up', default='none,1,background', help='comma separated WARM_UP values')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    results = {"python": sys.version.split()[0], "runs": args.runs, "modes": {}}
+    print(f"{'WARM_UP':<12} {'import median (s)':>18} {'first /api/health median (s)':>30}  lazy modules loaded at import")
+
+    for warm_up in args.warm_up.split(','):
+        imports = [cold_import(warm_up) for _ in range(args.runs)]
+        health = [first_health(warm_up) for _ in range(args.runs)]
+        results["modes"][warm_up] = {
+            "import": summarize([run["import_s"] for run in imports]),
+            "first_health": summarize(health),
+            "lazy_loaded_at_import": imports[-1]["lazy_loaded"]
+        }
+        mode = results["modes"][warm_up]
+        print(f"{warm_up:<12} {mode['import']['median_s']:>18.3f} {mode['first_health']['median_s']:>30.3f}  "
+              f"{', '.join(mode['lazy_loaded_at_import']) or '-'}")
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Local stand-in for the OpenAI and Gemini endpoints the backend calls, with
+configurable latency and error rate. Answers are canned but shaped like the
+real ones: frame descriptions (single and batched), whisper verbose_json
+word timings, planner STEPS replies, and executor function/tool calls.
+
+    python benchmarks/stub_models.py --port 8090 --latency 0.5 --error-rate 0.05
+
+then run the backend with OPENAI_BASE_URL=http://127.0.0.1:8090/v1 and
+GEMINI_BASE_URL=http://127.0.0.1:8090/v1 (any API keys).
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PLANNER_STEPS = [
+    "Convert the first clip to grayscale",
+    "Increase the brightness of the first clip",
+    "Add a fade in to the first clip"
+]
+
+EXECUTOR_CALLS = [
+    ("convertToGrayscale", {"clipId": "1"}),
+    ("adjustBrightness", {"clipId": "1", "brightness": 0.2}),
+    ("applyFadeIn", {"clipId": "1", "duration": 1})
+]
+
+TRANSCRIPT_WORDS = "so today we are going to edit this video and make it look great".split()
+
+
+class StubModelServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.errors = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self.lock:
+            return {"requests": dict(self.counts), "injected_errors": self.errors}
+
+    def _delay_and_fail(self, kind):
+        with self.lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            delay = max(0.0, self.random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        time.sleep(delay)
+        return fail
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.endswith("/audio/transcriptions"):
+                    kind, reply = "transcription", _transcription
+                elif self.path.endswith("/chat/completions"):
+                    payload = json.loads(body)
+                    kind, reply = _chat_kind(payload), lambda: _chat(payload)
+                else:
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                if stub._delay_and_fail(kind):
+                    self._send(500, {"error": {"message": "Injected stub failure", "type": "server_error"}})
+                    return
+                self._send(200, reply())
+
+        return Handler
+
+
+def _chat_kind(payload):
+    if str(payload.get("model", "")).startswith("gemini"):
+        return "planner"
+    if payload.get("tools"):
+        return "executor_batch"
+    if payload.get("functions"):
+        return "executor"
+    return "vision"
+
+
+def _completion(payload, message):
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", **message}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
+
+def _chat(payload):
+    kind = _chat_kind(payload)
+    if kind == "planner":
+        return _completion(payload, {"content": "STEPS\n" + "\n".join(PLANNER_STEPS)})
+
+    if kind == "executor":
+        name, args = EXECUTOR_CALLS[0]
+        return _completion(payload, {"content": None, "function_call": {"name": name, "arguments": json.dumps(args)}})
+
+    if kind == "executor_batch":
+        # The numbered steps are in the "Here are the steps:" message, wherever the prompt puts it
+        steps = [
+            step for message in payload["messages"]
+            if isinstance(message.get("content"), str) and message["content"].startswith("Here are the steps:")
+            for step in re.findall(r"^\d+\. ", message["content"], re.MULTILINE)
+        ]
+        calls = [{
+            "id": f"call_{i}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(args)}
+        } for i, (name, args) in enumerate(EXECUTOR_CALLS[i % len(EXECUTOR_CALLS)] for i in range(len(steps)))]
+        return _completion(payload, {"content": None, "tool_calls": calls})
+
+    images = sum(
+        1 for message in payload.get("messages", []) if isinstance(message.get("content"), list)
+        for part in message["content"] if part.get("type") == "image_url"
+    )
+    if (payload.get("response_format") or {}).get("type") == "json_object":
+        frames = [f"Stub description of frame {i + 1}: a test pattern with colour bars." for i in range(images)]
+        return _completion(payload, {"content": json.dumps({"frames": frames})})
+    return _completion(payload, {"content": "Stub description: a test pattern with colour bars."})
+
+
+def _transcription():
+    words = [
+        {"word": word, "start": round(i * 0.4, 2), "end": round(i * 0.4 + 0.3, 2)}
+        for i, word in enumerate(TRANSCRIPT_WORDS)
+    ]
+    return {"task": "transcribe", "language": "english", "duration": words[-1]["end"],
+            "text": ' '.join(TRANSCRIPT_WORDS), "words": words}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='standard deviation of the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with a 500')
+    args = parser.parse_args()
+
+    stub = StubModelServer(args.host, args.port, args.latency, args.jitter, args.error_rate)
+    print(f"Stub models listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+import json
+
+# Rough chars-per-token ratio for English prose and JSON; close enough for budgeting
+CHARS_PER_TOKEN = 4
+
+ATTRIBUTE_COLUMNS = ["red", "green", "blue", "saturation", "contrast", "brightness"]
+
+# Progressively lossier settings tried until the context fits the token budget
+COMPACTION_LEVELS = [
+    {"description_words": None, "transcript_words": None, "attribute_tolerance": 2, "attributes": "ranges"},
+    {"description_words": 40, "transcript_words": None, "attribute_tolerance": 5, "attributes": "ranges"},
+    {"description_words": 20, "transcript_words": None, "attribute_tolerance": 10, "attributes": "ranges"},
+    {"description_words": 12, "transcript_words": None, "attribute_tolerance": None, "attributes": "mean"},
+    {"description_words": 8, "transcript_words": 8, "attribute_tolerance": None, "attributes": "mean"},
+]
+
+# Range lists that are thinned out when even the last level is over budget
+RANGE_KEYS = ("imageDescriptions", "transcription")
+
+FORMAT_NOTE = (
+    "Ranges are [first_second, last_second, value]; imageAttributes rows are "
+    "[first_second, last_second, " + ", ".join(ATTRIBUTE_COLUMNS) + "]; "
+    "imageAttributesMean is [" + ", ".join(ATTRIBUTE_COLUMNS) + "] over the whole clip; "
+    "clips with only a summary are not relevant to this request"
+)
+
+# Consecutive descriptions sharing at least this fraction of words count as one
+DESCRIPTION_SIMILARITY = 0.85
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def legacy_context(contexts):
+    # The str() of per-second annotations that prepare_context used to send
+    annotated_context = []
+    for context in contexts:
+        annotated_context.append({
+            "imageDescriptions": [f"second {i + 1}: {desc}" for i, desc in enumerate(context.get("imageDescriptions", []))],
+            "imageAttributes": [f"second {i + 1}: {attr}" for i, attr in enumerate(context.get("imageAttributes", []))],
+            "transcription": [f"second {i + 1}: {trans}" for i, trans in enumerate(context.get("transcription", []))],
+            "mediaId": context.get("mediaId", "unknown"),
+            "duration": context.get("duration", 0),
+            "start": context.get("start", 0),
+            "clip_id": context.get("clip_id", "unknown")
+        })
+    return str(annotated_context)
+
+
+def _words(text):
+    return set(str(text).lower().split())
+
+
+def _similar(a, b):
+    if a == b:
+        return True
+    words_a, words_b = _words(a), _words(b)
+    if not words_a or not words_b:
+        return False
+    return len(words_a & words_b) / len(words_a | words_b) >= DESCRIPTION_SIMILARITY
+
+
+def _truncate(text, words):
+    if words is None:
+        return text
+    parts = str(text).split()
+    return text if len(parts) <= words else ' '.join(parts[:words]) + '...'
+
+
+def _text_ranges(values, similar, transform=lambda value: value):
+    # [[first_second, last_second, text], ...] with 1-based seconds, skipping blanks
+    ranges = []
+    for second, value in enumerate(values, start=1):
+        if value is None or str(value).strip() == "":
+            continue
+        if ranges and ranges[-1][1] == second - 1 and similar(ranges[-1][3], value):
+            ranges[-1][1] = second
+            continue
+        ranges.append([second, second, transform(value), value])
+    return [r[:3] for r in ranges]
+
+
+def _attribute_row(attr):
+    if not isinstance(attr, dict):
+        return None
+    rgb = attr.get("rgb_level") or {}
+    values = [rgb.get("Red"), rgb.get("Green"), rgb.get("Blue"),
+              attr.get("saturation"), attr.get("contrast"), attr.get("brightness")]
+    try:
+        return [int(round(float(value))) for value in values]
+    except (TypeError, ValueError):
+        return None
+
+
+def _attribute_ranges(attrs, tolerance):
+    ranges = []
+    for second, attr in enumerate(attrs, start=1):
+        row = _attribute_row(attr)
+        if row is None:
+            continue
+        if ranges and ranges[-1][1] == second - 1 and \
+                max(abs(a - b) for a, b in zip(ranges[-1][2], row)) <= tolerance:
+            ranges[-1][1] = second
+            continue
+        ranges.append([second, second, row])
+    return [[start, end] + row for start, end, row in ranges]
+
+
+def _attribute_mean(attrs):
+    rows = [row for row in (_attribute_row(attr) for attr in attrs) if row is not None]
+    if not rows:
+        return []
+    return [int(round(sum(column) / len(rows))) for column in zip(*rows)]
+
+
+def _focus_clip(index, context, level, focus):
+    if focus is None:
+        return _compact_clip(context, level)
+    if index not in focus:
+        return _summary_clip(context)
+    if focus[index] is None:
+        return _compact_clip(context, level)
+    return _compact_clip(_mask_seconds(context, focus[index]), level)
+
+
+def _compact_clip(context, level):
+    clip = {
+        "clip_id": context.get("clip_id", "unknown"),
+        "mediaId": context.get("mediaId", "unknown"),
+        "start": context.get("start", 0),
+        "duration": context.get("duration", 0),
+        "imageDescriptions": _text_ranges(
+            context.get("imageDescriptions", []), _similar,
+            lambda text: _truncate(text, level["description_words"])
+        ),
+        "transcription": _text_ranges(
+            context.get("transcription", []), lambda a, b: a == b,
+            lambda text: _truncate(text, level["transcript_words"])
+        )
+    }
+
+    attrs = context.get("imageAttributes", [])
+    if level["attributes"] == "mean":
+        clip["imageAttributesMean"] = _attribute_mean(attrs)
+    else:
+        clip["imageAttributes"] = _attribute_ranges(attrs, level["attribute_tolerance"])
+    return clip
+
+
+def _mask_seconds(context, seconds):
+    # Keep only the given 0-based seconds; the rest are blanked and drop out of the ranges
+    masked = dict(context)
+    for key in ("imageDescriptions", "imageAttributes", "transcription"):
+        values = context.get(key) or []
+        masked[key] = [value if second in seconds else None for second, value in enumerate(values)]
+    return masked
+
+
+def _summary_clip(context):
+    descriptions = [text for text in context.get("imageDescriptions") or [] if text]
+    return {
+        "clip_id": context.get("clip_id", "unknown"),
+        "mediaId": context.get("mediaId", "unknown"),
+        "start": context.get("start", 0),
+        "duration": context.get("duration", 0),
+        "summary": _truncate(descriptions[0], 12) if descriptions else ""
+    }
+
+
+def _thin(clip, stride):
+    # Every stride-th description and transcript range; the kept ones still carry their seconds
+    thinned = dict(clip)
+    for key in RANGE_KEYS:
+        if key in clip:
+            thinned[key] = clip[key][::stride]
+    return thinned
+
+
+def serialize(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def build_context(contexts, token_budget=None, focus=None):
+    """
+    Compact, deterministic serialization of the timeline's clip contexts. Runs of
+    near-identical seconds collapse into [first, last, value] ranges (seconds are
+    1-based) and attributes are rounded integers. When `token_budget` is set the
+    lossier levels of COMPACTION_LEVELS are tried until the text fits. Past the
+    last level, every 2nd, 4th, ... description and transcript range is kept
+    until it does, and as a last resort every clip is reduced to a summary.
+
+    `focus` ({clip index: None for the whole clip, or a set of 0-based seconds})
+    limits the detail to those clips and seconds; every other clip is reduced to
+    a one-line summary.
+
+    Returns the text and a stats dict comparing it with the old str() context.
+    """
+    legacy_tokens = estimate_tokens(legacy_context(contexts))
+
+    def over_budget():
+        return token_budget and tokens > token_budget
+
+    for level_index, level in enumerate(COMPACTION_LEVELS):
+        clips = [_focus_clip(i, context, level, focus) for i, context in enumerate(contexts)]
+        text = serialize({"format": FORMAT_NOTE, "clips": clips})
+        tokens = estimate_tokens(text)
+        if not over_budget():
+            break
+
+    stride = 1
+    longest = max((len(clip.get(key, [])) for clip in clips for key in RANGE_KEYS), default=0)
+    while over_budget() and stride < longest:
+        stride *= 2
+        text = serialize({"format": FORMAT_NOTE, "clips": [_thin(clip, stride) for clip in clips]})
+        tokens = estimate_tokens(text)
+
+    if over_budget():
+        level_index = len(COMPACTION_LEVELS)
+        text = serialize({"format": FORMAT_NOTE, "clips": [_summary_clip(context) for context in contexts]})
+        tokens = estimate_tokens(text)
+
+    return text, {
+        "legacy_tokens": legacy_tokens,
+        "tokens": tokens,
+        "tokens_saved": legacy_tokens - tokens,
+        "compaction_level": level_index,
+        "range_stride": stride,
+        "focused_clips": len(focus) if focus is not None else len(contexts),
+        "within_budget": not token_budget or tokens <= token_budget
+    }
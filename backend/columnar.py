@@ -0,0 +1,215 @@
+import base64
+import gzip
+import json
+import math
+import sys
+import zlib
+from array import array
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FORMAT = "gencut.columnar/1"
+
+# Column name -> path into an image_attr dict as get_frame_attributes returns it
+ATTRIBUTE_PATHS = {
+    "red": ("rgb_level", "Red"),
+    "green": ("rgb_level", "Green"),
+    "blue": ("rgb_level", "Blue"),
+    "saturation": ("saturation",),
+    "contrast": ("contrast",),
+    "brightness": ("brightness",),
+    "blur": ("blur",),
+    "color_grading_a": ("color_grading", 0),
+    "color_grading_b": ("color_grading", 1),
+}
+
+# Responses smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 1024
+# Largest request body we inflate; a few KB of gzip or brotli can expand to gigabytes
+MAX_DECOMPRESSED_BYTES = 32 * 2 ** 20
+
+
+class PayloadTooLarge(ValueError):
+    pass
+
+
+def _lookup(attr, path):
+    value = attr
+    for key in path:
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return value
+
+
+def _float32_column(values):
+    column = array('f', (math.nan if value is None else float(value) for value in values))
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return base64.b64encode(column.tobytes()).decode('ascii')
+
+
+def _read_float32_column(encoded):
+    column = array('f')
+    column.frombytes(base64.b64decode(encoded))
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return [None if math.isnan(value) else value for value in column]
+
+
+def encode_attributes(attrs):
+    """
+    Per-second attribute dicts as little-endian float32 columns, base64 encoded
+    (a Float32Array in the browser). Missing seconds are NaN. Columns no second
+    has are left out.
+    """
+    columns = {}
+    for name, path in ATTRIBUTE_PATHS.items():
+        values = [_lookup(attr, path) for attr in attrs]
+        if any(value is not None for value in values):
+            columns[name] = _float32_column(values)
+    return {"dtype": "float32", "byteorder": "little", "encoding": "base64", "length": len(attrs), "columns": columns}
+
+
+def decode_attributes(block):
+    # Back to per-second dicts shaped like get_frame_attributes results
+    columns = {name: _read_float32_column(encoded) for name, encoded in block.get("columns", {}).items()}
+    attrs = []
+    for i in range(block.get("length", 0)):
+        row = {name: values[i] for name, values in columns.items() if i < len(values)}
+        if all(value is None for value in row.values()):
+            attrs.append(None)
+            continue
+        attr = {}
+        if any(name in row for name in ("red", "green", "blue")):
+            attr["rgb_level"] = {"Red": row.get("red"), "Green": row.get("green"), "Blue": row.get("blue")}
+        for name in ("saturation", "contrast", "brightness", "blur"):
+            if name in row:
+                attr[name] = row[name]
+        if "color_grading_a" in row:
+            attr["color_grading"] = [row["color_grading_a"], row.get("color_grading_b")]
+        attrs.append(attr)
+    return attrs
+
+
+def encode_result(result):
+    # A preprocess result in the columnar format
+    return {
+        "format": FORMAT,
+        "seconds": len(result["image_description"]),
+        "image_description": result["image_description"],
+        "transcription": result["transcription"],
+        "image_attr": encode_attributes(result["image_attr"])
+    }
+
+
+def decode_result(payload):
+    return {
+        "image_description": payload.get("image_description", []),
+        "transcription": payload.get("transcription", []),
+        "image_attr": decode_attributes(payload.get("image_attr", {}))
+    }
+
+
+def is_columnar(payload):
+    return isinstance(payload, dict) and payload.get("format") == FORMAT
+
+
+def normalize_context(context):
+    """
+    A clip context as prepare_context expects it (imageDescriptions,
+    imageAttributes, transcription lists), from either that shape, a columnar
+    `preprocess` payload, or imageAttributes given as a columnar block.
+    """
+    if is_columnar(context.get("preprocess")):
+        result = decode_result(context["preprocess"])
+        context = {key: value for key, value in context.items() if key != "preprocess"}
+        context.setdefault("imageDescriptions", result["image_description"])
+        context.setdefault("imageAttributes", result["image_attr"])
+        context.setdefault("transcription", result["transcription"])
+    elif isinstance(context.get("imageAttributes"), dict) and "columns" in context["imageAttributes"]:
+        context = dict(context, imageAttributes=decode_attributes(context["imageAttributes"]))
+    return context
+
+
+def normalize_contexts(contexts):
+    return [normalize_context(context) for context in contexts]
+
+
+def negotiate_encoding(accept_encoding):
+    # Best content coding we can produce for an Accept-Encoding header, or None
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            offered[name.lower()] = quality
+
+    for encoding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        quality = offered.get(encoding, offered.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _too_large(max_bytes):
+    return PayloadTooLarge(f"Request body inflates to more than {max_bytes} bytes")
+
+
+def _gunzip(data, max_bytes):
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        output = decompressor.decompress(data, max_bytes + 1)
+    except zlib.error as e:
+        raise ValueError(f"Invalid gzip body: {e}")
+    if len(output) > max_bytes or decompressor.unconsumed_tail:
+        raise _too_large(max_bytes)
+    if not decompressor.eof:
+        raise ValueError("Truncated gzip body")
+    return output
+
+
+def _unbrotli(data, max_bytes):
+    decompressor = brotli.Decompressor()
+    try:
+        output = decompressor.process(data, output_buffer_limit=max_bytes + 1)
+    except brotli.error as e:
+        raise ValueError(f"Invalid brotli body: {e}")
+    if len(output) > max_bytes:
+        raise _too_large(max_bytes)
+    if not decompressor.is_finished():
+        raise ValueError("Truncated brotli body")
+    return output
+
+
+def decompress(data, encoding, max_bytes=MAX_DECOMPRESSED_BYTES):
+    # Raises PayloadTooLarge rather than inflating past max_bytes
+    encoding = (encoding or "identity").lower()
+    if encoding == "gzip":
+        return _gunzip(data, max_bytes)
+    if encoding == "br":
+        if brotli is None:
+            raise ValueError("brotli request bodies need the brotli package")
+        return _unbrotli(data, max_bytes)
+    if encoding == "identity":
+        return data
+    raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+
+def read_json(data, encoding=None, max_bytes=MAX_DECOMPRESSED_BYTES):
+    return json.loads(decompress(data, encoding, max_bytes))
@@ -0,0 +1,171 @@
+import re
+
+import numpy as np
+
+from transcription import RMS_WINDOW, SAMPLE_RATE, rms_envelope
+
+FILLERS = {"um", "umm", "uh", "uhh", "uhm", "er", "erm", "ah", "hmm", "hm", "mm", "mhm"}
+
+# Silence between words longer than this is a gap; PADDING seconds stay on each side
+GAP_SECONDS = 0.75
+PADDING = 0.15
+# Audio quieter than this for at least DEAD_AIR_SECONDS is dead air, wherever it falls
+DEAD_AIR_SECONDS = 1.0
+SILENCE_DB = -40.0
+# Trailing marks Whisper puts on a word cut off mid-way ("b-")
+FRAGMENT_MARKS = ("-", "\u2013", "\u2014")
+# Longest phrase checked for immediate repetition ("I was I was")
+MAX_REPEAT_WORDS = 3
+# Words further apart than this don't count as a repetition
+REPEAT_GAP = 1.0
+
+
+def _normalize(word):
+    return re.sub(r"[^a-z0-9']", "", str(word).lower())
+
+
+def _is_marked_fragment(word):
+    return str(word).strip().endswith(FRAGMENT_MARKS)
+
+
+def _candidate(kind, start, end, text=None):
+    return {"kind": [kind], "start_time": start, "end_time": end, "text": text}
+
+
+def find_repetitions(words):
+    """
+    Immediate repeats of a word or short phrase, and broken words that restart
+    as the next word. The earlier attempts are trimmed and the last one kept.
+    A word only counts as broken when Whisper marks it as cut off ("b-") or
+    when it was already restarted once ("b b but"); a short word that merely
+    starts the next one ("we were", "on one") is ordinary speech.
+    """
+    tokens = [_normalize(word["word"]) for word in words]
+    candidates = []
+    i = 0
+    while i < len(words):
+        found = False
+        for size in range(MAX_REPEAT_WORDS, 0, -1):
+            phrase = tokens[i:i + size]
+            if len(phrase) < size or not all(phrase):
+                continue
+            # Consume back-to-back copies of the phrase
+            end = i
+            while (tokens[end + size:end + 2 * size] == phrase
+                   and words[end + size]["start"] - words[end + size - 1]["end"] <= REPEAT_GAP):
+                end += size
+            if end > i:
+                text = ' '.join(word["word"] for word in words[i:end])
+                candidates.append(_candidate("repetition", words[i]["start"], words[end]["start"], text))
+                i = end
+                found = True
+                break
+        if found:
+            continue
+
+        restarted = i > 0 and tokens[i - 1] == tokens[i]
+        if (i + 1 < len(words) and tokens[i] and tokens[i + 1] != tokens[i]
+                and (_is_marked_fragment(words[i]["word"])
+                     or (restarted and tokens[i + 1].startswith(tokens[i])))
+                and words[i + 1]["start"] - words[i]["end"] <= REPEAT_GAP):
+            candidates.append(_candidate("broken_word", words[i]["start"], words[i + 1]["start"], words[i]["word"]))
+        i += 1
+    return candidates
+
+
+def find_fillers(words):
+    return [
+        _candidate("filler", word["start"], word["end"], word["word"])
+        for word in words if _normalize(word["word"]) in FILLERS
+    ]
+
+
+def find_gaps(words, duration=None, gap=GAP_SECONDS, padding=PADDING):
+    # Pauses between words, plus leading and trailing silence when the duration is known
+    if not words:
+        return []
+    ends = [0.0] + [word["end"] for word in words]
+    starts = [word["start"] for word in words] + ([duration] if duration is not None else [])
+
+    candidates = []
+    for i, (start, end) in enumerate(zip(ends, starts)):
+        if end - start > gap:
+            # No padding at the edges of the clip
+            low = start + (padding if i > 0 else 0)
+            high = end - (padding if i < len(words) else 0)
+            candidates.append(_candidate("gap", low, high))
+    return candidates
+
+
+def find_dead_air(envelope, window=RMS_WINDOW, min_seconds=DEAD_AIR_SECONDS,
+                  silence_db=SILENCE_DB, padding=PADDING):
+    # Runs of RMS windows below silence_db dBFS
+    if len(envelope) == 0:
+        return []
+    quiet = 20 * np.log10(np.maximum(envelope, 1e-10)) < silence_db
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], quiet.astype(np.int8), [0]))))
+    candidates = []
+    for low, high in zip(edges[0::2], edges[1::2]):
+        if (high - low) * window >= min_seconds:
+            start = low * window + (padding if low > 0 else 0)
+            end = high * window - (padding if high < len(envelope) else 0)
+            candidates.append(_candidate("dead_air", start, end))
+    return candidates
+
+
+def merge_candidates(candidates):
+    merged = []
+    for candidate in sorted(candidates, key=lambda c: (c["start_time"], c["end_time"])):
+        if candidate["end_time"] <= candidate["start_time"]:
+            continue
+        if merged and candidate["start_time"] <= merged[-1]["end_time"]:
+            last = merged[-1]
+            last["end_time"] = max(last["end_time"], candidate["end_time"])
+            last["kind"] += [kind for kind in candidate["kind"] if kind not in last["kind"]]
+            last["text"] = ' '.join(text for text in (last["text"], candidate["text"]) if text) or None
+        else:
+            merged.append(dict(candidate, kind=list(candidate["kind"])))
+    return merged
+
+
+def keep_segments(candidates, duration):
+    # The parts left between candidates, as trim_video parameters
+    segments = []
+    position = 0.0
+    for candidate in candidates:
+        if candidate["start_time"] > position:
+            segments.append({"start_time": round(position, 3), "end_time": round(candidate["start_time"], 3)})
+        position = max(position, candidate["end_time"])
+    if duration is not None and duration > position:
+        segments.append({"start_time": round(position, 3), "end_time": round(duration, 3)})
+    return segments
+
+
+def detect(words, samples=None, sample_rate=SAMPLE_RATE, duration=None):
+    """
+    Trim candidates from word timings (dicts with word/start/end in seconds) and,
+    when given, the mono PCM samples of the same audio. Candidates carry
+    trim_video style start_time/end_time in seconds and the kinds that produced
+    them; `keep` lists the segments to keep between them.
+    """
+    words = sorted(
+        ({"word": str(word["word"]), "start": float(word["start"]), "end": float(word["end"])} for word in words),
+        key=lambda word: word["start"]
+    )
+    if samples is not None and duration is None:
+        duration = len(samples) / sample_rate
+
+    candidates = find_repetitions(words) + find_fillers(words) + find_gaps(words, duration)
+    if samples is not None:
+        candidates += find_dead_air(rms_envelope(samples, sample_rate))
+
+    merged = merge_candidates(candidates)
+    for candidate in merged:
+        candidate["start_time"] = round(candidate["start_time"], 3)
+        candidate["end_time"] = round(candidate["end_time"], 3)
+
+    return {
+        "candidates": merged,
+        "keep": keep_segments(merged, duration),
+        "removed_seconds": round(sum(c["end_time"] - c["start_time"] for c in merged), 3)
+    }
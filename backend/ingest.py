@@ -0,0 +1,198 @@
+import hashlib
+import os
+import tempfile
+
+from flask import Request
+
+# Uploads up to this size stay in memory, larger ones spill to SPOOL_DIR
+SPOOL_MEMORY_LIMIT = int(os.getenv('SPOOL_MEMORY_LIMIT', 64 * 1024 * 1024))
+SPOOL_DIR = os.getenv('SPOOL_DIR') or None
+
+# Linux lets anonymous (memfd or unlinked) files be opened by path through /proc,
+# so nothing is left behind even if the process dies mid-request
+ANONYMOUS_FILES = hasattr(os, 'memfd_create') and os.path.isdir('/proc/self/fd')
+
+
+class MediaSpool:
+    """
+    Writable, seekable file holding one upload. Content lives in memory up to
+    `memory_limit` bytes and is spilled to disk past that. `path` can be handed to
+    cv2 or ffmpeg; pass `pass_fds` along to subprocesses so they can open it.
+    The content hash is computed while the upload streams in.
+    """
+
+    def __init__(self, memory_limit=SPOOL_MEMORY_LIMIT, spool_dir=SPOOL_DIR):
+        self.memory_limit = memory_limit
+        self.spool_dir = spool_dir
+        self.size = 0
+        self._position = 0
+        self._hash = hashlib.sha256()
+        self._hash_valid = True
+        self._fd = None
+        self._disk_path = None
+
+        if ANONYMOUS_FILES and memory_limit > 0:
+            self._fd = os.memfd_create('gencut-upload')
+            self.in_memory = True
+        else:
+            self._fd = self._open_disk_file()
+            self.in_memory = False
+
+    def _open_disk_file(self):
+        fd, path = tempfile.mkstemp(dir=self.spool_dir, prefix='gencut-upload-')
+        if ANONYMOUS_FILES:
+            os.unlink(path)
+        else:
+            self._disk_path = path
+        return fd
+
+    def _spill(self):
+        disk_fd = self._open_disk_file()
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        while True:
+            chunk = os.read(self._fd, 1 << 20)
+            if not chunk:
+                break
+            os.write(disk_fd, chunk)
+        os.close(self._fd)
+        self._fd = disk_fd
+        self.in_memory = False
+
+    def write(self, data):
+        data = memoryview(data)
+        if self.in_memory and max(self.size, self._position + len(data)) > self.memory_limit:
+            self._spill()
+
+        if self._position != self.size:
+            self._hash_valid = False
+        elif self._hash_valid:
+            self._hash.update(data)
+
+        os.lseek(self._fd, self._position, os.SEEK_SET)
+        written = 0
+        while written < len(data):
+            written += os.write(self._fd, data[written:])
+        self._position += written
+        self.size = max(self.size, self._position)
+        return written
+
+    def read(self, size=-1):
+        os.lseek(self._fd, self._position, os.SEEK_SET)
+        if size is None or size < 0:
+            size = self.size - self._position
+        data = os.read(self._fd, size)
+        self._position += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    @property
+    def closed(self):
+        return self._fd is None
+
+    @property
+    def path(self):
+        if self._disk_path is not None:
+            return self._disk_path
+        return f"/proc/self/fd/{self._fd}"
+
+    @property
+    def shared_path(self):
+        # Like `path`, but also openable by other processes of the same user
+        # (e.g. decode workers) while this spool stays open
+        if self._disk_path is not None:
+            return self._disk_path
+        return f"/proc/{os.getpid()}/fd/{self._fd}"
+
+    @property
+    def pass_fds(self):
+        return (self._fd,) if self._disk_path is None else ()
+
+    @property
+    def content_hash(self):
+        if not self._hash_valid:
+            self._hash = hashlib.sha256()
+            position = self._position
+            self.seek(0)
+            for chunk in iter(lambda: self.read(1 << 20), b''):
+                self._hash.update(chunk)
+            self.seek(position)
+            self._hash_valid = True
+        return self._hash.hexdigest()
+
+    def take(self):
+        """
+        Move the content into a new spool owned by the caller, leaving this one
+        empty so closing it (as Flask does at the end of a request) is a no-op.
+        """
+        spool = MediaSpool.__new__(MediaSpool)
+        spool.__dict__.update(self.__dict__)
+        self._fd = None
+        self._disk_path = None
+        return spool
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._disk_path is not None:
+            try:
+                os.remove(self._disk_path)
+            except OSError:
+                pass
+            self._disk_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+class SpoolingRequest(Request):
+    # Uploaded files stream straight into a MediaSpool instead of werkzeug's
+    # own temp file, so each upload is written exactly once
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return MediaSpool()
+
+
+def spool_upload(file_storage):
+    """
+    Take ownership of an uploaded file as a MediaSpool, copying it only when the
+    request was not parsed by SpoolingRequest.
+    """
+    if isinstance(file_storage.stream, MediaSpool):
+        return file_storage.stream.take()
+
+    spool = MediaSpool()
+    try:
+        for chunk in iter(lambda: file_storage.stream.read(1 << 20), b''):
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
+    return spool
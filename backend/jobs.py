@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    """
+    State of one background preprocess. The runner fills in frames as their
+    descriptions complete so callers can read partial results while it runs.
+    Partial results hold one entry per sample, `interval` seconds apart; the
+    finished result has one entry per second.
+    """
+
+    def __init__(self, expected_frames=None, interval=1.0):
+        self.job_id = uuid.uuid4().hex
+        self.status = "queued"
+        self.expected_frames = expected_frames
+        self.interval = interval
+        self.image_description = []
+        self.image_attr = []
+        self.frames_done = 0
+        self.transcription = None
+        self.report = {}
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.lock = threading.Lock()
+
+    def record_frame(self, index, description, attr):
+        with self.lock:
+            missing = index + 1 - len(self.image_description)
+            if missing > 0:
+                self.image_description.extend([None] * missing)
+                self.image_attr.extend([None] * missing)
+            self.image_description[index] = description
+            self.image_attr[index] = attr
+            self.frames_done += 1
+
+    def finish(self, status, result=None, report=None, error=None):
+        with self.lock:
+            self.status = status
+            if result is not None:
+                self.image_description = result['image_description']
+                self.image_attr = result['image_attr']
+                self.transcription = result['transcription']
+                self.frames_done = len(self.image_description)
+                self.interval = 1.0
+            self.report = report or {}
+            self.error = error
+            self.finished_at = time.time()
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed", "cancelled")
+
+    def status_dict(self):
+        with self.lock:
+            total = self.expected_frames
+            if self.status == "completed" or (total is not None and self.frames_done > total):
+                total = self.frames_done
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "frames_done": self.frames_done,
+                "frames_total": total,
+                "progress": self.frames_done / total if total else None,
+                "transcription_ready": self.transcription is not None,
+                "report": self.report,
+                "error": self.error
+            }
+
+    def results_dict(self):
+        with self.lock:
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "interval": self.interval,
+                "image_description": list(self.image_description),
+                "image_attr": list(self.image_attr),
+                "transcription": self.transcription
+            }
+
+
+class JobManager:
+    """
+    Runs jobs on a shared bounded executor and refuses new submissions once
+    max_pending jobs are queued or running. Finished jobs are kept for ttl
+    seconds so their results can still be fetched.
+    """
+
+    def __init__(self, executor, max_pending, ttl=3600):
+        self.executor = executor
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def _prune(self):
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.done and job.finished_at and now - job.finished_at > self.ttl:
+                del self.jobs[job_id]
+
+    def submit(self, run, expected_frames=None, cleanup=None, interval=1.0):
+        """
+        Schedule run(job), which returns (result, report). cleanup() is always
+        called once the job leaves the executor, even if it never started.
+        """
+        with self.lock:
+            self._prune()
+            pending = sum(1 for job in self.jobs.values() if not job.done)
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs already pending")
+
+            job = Job(expected_frames, interval)
+            self.jobs[job.job_id] = job
+            job.future = self.executor.submit(self._run, job, run)
+
+        if cleanup is not None:
+            job.future.add_done_callback(lambda _: cleanup())
+        return job
+
+    def _run(self, job, run):
+        if job.cancel_event.is_set():
+            job.finish("cancelled")
+            return
+
+        with job.lock:
+            job.status = "running"
+        try:
+            result, report = run(job)
+        except Exception as e:
+            if job.cancel_event.is_set():
+                job.finish("cancelled")
+            else:
+                logger.error(f"Job {job.job_id} failed: {str(e)}")
+                job.finish("failed", error=str(e))
+            return
+        job.finish("completed", result, report)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.finish("cancelled")
+        return job
@@ -0,0 +1,63 @@
+import importlib
+import sys
+import threading
+import time
+
+# Seconds each lazy module took to import, filled in as they load
+load_times = {}
+_lock = threading.RLock()
+
+
+class LazyModule:
+    """
+    Stands in for a module until one of its attributes is first used, then
+    imports it. Lets app.py refer to cv2/numpy-backed modules without paying
+    for them in processes or endpoints that never touch them.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with _lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    name = self.__dict__['_name']
+                    start = time.perf_counter()
+                    module = importlib.import_module(name)
+                    if name not in load_times:
+                        load_times[name] = round(time.perf_counter() - start, 4)
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__['_module'] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name):
+    # Already imported modules are returned as they are
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def preload(*modules):
+    """
+    Import the given lazy modules now. Returns {name: seconds} for the ones that
+    were actually loaded by this call.
+    """
+    timings = {}
+    for module in modules:
+        if isinstance(module, LazyModule) and module.__dict__['_module'] is None:
+            start = time.perf_counter()
+            module._load()
+            timings[module.__dict__['_name']] = round(time.perf_counter() - start, 4)
+    return timings
@@ -0,0 +1,219 @@
+import bisect
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; the last bucket catches everything above
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=SECONDS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the percentile, capped at the max seen
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (self.max,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], self.counts))
+        }
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """
+    In-process histograms and counters keyed by name and labels, plus the spans
+    of the most recent `max_traces` traces.
+    """
+
+    def __init__(self, max_traces=200):
+        self.histograms = {}
+        self.counters = {}
+        self.traces = OrderedDict()
+        self.max_traces = max_traces
+        self.lock = threading.Lock()
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def record_span(self, trace_id, span):
+        with self.lock:
+            spans = self.traces.get(trace_id)
+            if spans is None:
+                spans = self.traces[trace_id] = []
+                while len(self.traces) > self.max_traces:
+                    self.traces.popitem(last=False)
+            spans.append(span)
+
+    def trace(self, trace_id):
+        with self.lock:
+            spans = self.traces.get(trace_id)
+            return None if spans is None else list(spans)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **histogram.snapshot()}
+                    for (name, labels), histogram in sorted(self.histograms.items())
+                ],
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ]
+            }
+
+    def prometheus(self):
+        # Prometheus text exposition format
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+        lines = []
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"gencut_{name}{label_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip([str(bound) for bound in histogram.buckets] + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f"gencut_{name}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"gencut_{name}_sum{label_text(labels)} {histogram.sum}")
+                lines.append(f"gencut_{name}_count{label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace():
+    return _trace.get()
+
+
+def start_trace(trace_id=None):
+    # Returns a token for end_trace
+    return _trace.set(trace_id or new_trace_id())
+
+
+def end_trace(token):
+    _trace.reset(token)
+
+
+@contextmanager
+def trace(trace_id=None):
+    token = start_trace(trace_id)
+    try:
+        yield _trace.get()
+    finally:
+        end_trace(token)
+
+
+def bind(fn):
+    """
+    Wrap `fn` to run under the calling thread's trace, for work handed to
+    executor threads (which do not inherit context variables).
+    """
+    trace_id = _trace.get()
+
+    def bound(*args, **kwargs):
+        token = _trace.set(trace_id)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _trace.reset(token)
+    return bound
+
+
+def record(name, seconds, **fields):
+    """
+    Observe `seconds` in the `name`_seconds histogram (labelled by any string
+    `fields`) and add a span to the current trace. Numeric fields such as token
+    counts are kept on the span.
+    """
+    labels = {key: value for key, value in fields.items() if isinstance(value, str)}
+    registry.observe(f"{name}_seconds", seconds, **labels)
+    trace_id = _trace.get()
+    if trace_id is not None:
+        registry.record_span(trace_id, {"name": name, "seconds": round(seconds, 6), **fields})
+        logger.debug(json.dumps({"trace_id": trace_id, "span": name, "seconds": round(seconds, 6), **fields}))
+
+
+@contextmanager
+def span(name, **fields):
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        record(name, time.perf_counter() - start, **fields)
+
+
+def record_model_call(model, seconds, result=None, error=None):
+    # ModelScheduler on_call hook: one span per attempt with token usage when the API reports it
+    fields = {"model": str(model), "status": "error" if error is not None else "ok"}
+    usage = getattr(result, "usage", None)
+    if usage is not None:
+        for field in ("prompt_tokens", "completion_tokens"):
+            tokens = getattr(usage, field, None)
+            if tokens is not None:
+                fields[field] = tokens
+                registry.increment(f"model_{field}_total", tokens, model=str(model))
+                registry.observe(f"model_{field}", tokens, TOKEN_BUCKETS, model=str(model))
+    if error is not None:
+        registry.increment("model_errors_total", model=str(model))
+    record("model_call", seconds, **fields)
@@ -0,0 +1,73 @@
+import base64
+import time
+
+import cv2
+
+import utils
+
+# What preprocess used before proxies: full-size frames at OpenCV's default JPEG quality
+BASELINE_JPEG_QUALITY = 95
+
+
+class ProxyEncoder:
+    """
+    Downsizes decoded frames to a proxy with at most `long_edge` pixels on the
+    long side (0 keeps full size) and JPEG-encodes proxies for the vision model.
+    The first encoded frame is also encoded at full size once, so the report can
+    estimate the bytes and encode time the proxy saves. Frames that were already
+    shrunk while decoding come with the video's real `source_size` instead; the
+    full-size cost can't be sampled from them, so the savings are left out.
+    """
+
+    def __init__(self, long_edge=0, quality=BASELINE_JPEG_QUALITY, source_size=None):
+        self.long_edge = long_edge
+        self.quality = quality
+        self.pre_shrunk = source_size is not None
+        self.source_size = tuple(source_size) if source_size is not None else None
+        self.proxy_size = None
+        self.frames = 0
+        self.bytes = 0
+        self.encode_seconds = 0.0
+        self.baseline = None
+
+    def proxy(self, frame):
+        if self.source_size is None:
+            self.source_size = (frame.shape[1], frame.shape[0])
+        small = utils.downscale(frame, self.long_edge) if self.long_edge else frame
+        if self.proxy_size is None:
+            self.proxy_size = (small.shape[1], small.shape[0])
+        return small
+
+    def encode(self, frame, source=None):
+        # `frame` is a proxy; pass the full-size `source` to sample the baseline cost
+        if self.baseline is None and source is not None and not self.pre_shrunk:
+            start = time.perf_counter()
+            _, buffer = cv2.imencode('.jpg', source, [cv2.IMWRITE_JPEG_QUALITY, BASELINE_JPEG_QUALITY])
+            self.baseline = (len(buffer), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        encoded = base64.b64encode(buffer).decode('utf-8')
+        self.encode_seconds += time.perf_counter() - start
+        self.frames += 1
+        self.bytes += len(encoded)
+        return encoded
+
+    def stats(self):
+        stats = {
+            "proxy_long_edge": self.long_edge,
+            "jpeg_quality": self.quality,
+            "source_resolution": list(self.source_size) if self.source_size else None,
+            "proxy_resolution": list(self.proxy_size) if self.proxy_size else None,
+            "pre_shrunk": self.pre_shrunk,
+            "encoded_frames": self.frames,
+            "bytes_per_frame": round(self.bytes / self.frames) if self.frames else 0,
+            "encode_ms_per_frame": round(1000 * self.encode_seconds / self.frames, 2) if self.frames else 0
+        }
+        if self.baseline is not None and self.frames:
+            # base64 grows the JPEG by 4/3
+            baseline_bytes = round(self.baseline[0] * 4 / 3)
+            stats["baseline_bytes_per_frame"] = baseline_bytes
+            stats["bytes_saved"] = max(0, (baseline_bytes - stats["bytes_per_frame"]) * self.frames)
+            stats["encode_seconds_saved"] = round(max(0.0, self.baseline[1] * self.frames - self.encode_seconds), 3)
+        return stats
@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import re
+import subprocess
+import time
+import uuid
+
+from transcription import ffmpeg_exe
+
+logger = logging.getLogger(__name__)
+
+# Timeline-only functions; they change clip placement, not pixels
+TIMELINE_FUNCTIONS = ("moveClip", "deleteClip")
+
+ENCODE_ARGS = ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '20', '-threads', '0',
+               '-c:a', 'aac', '-b:a', '160k', '-movflags', '+faststart']
+
+
+# Codecs a stream copy can put in each output container. VP8 (MediaRecorder's
+# default) has no MP4 mapping, so WebM uploads are copied into WebM
+COPY_CONTAINERS = (
+    ("mp4", {"h264", "hevc", "mpeg4", "av1", "aac", "mp3", "ac3"}),
+    ("webm", {"vp8", "vp9", "av1", "opus", "vorbis"}),
+)
+
+_DURATION = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_PROGRESS = re.compile(r"time=(\d+):(\d+):(\d+(?:\.\d+)?)")
+_STREAM = re.compile(r"Stream #\d+:\d+\S*: (?:Video|Audio): (\w+)")
+
+
+def _seconds(match):
+    hours, minutes, seconds = match
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def parse_codecs(header):
+    # Video and audio codec names from ffmpeg's description of its input
+    return _STREAM.findall(header)
+
+
+def copy_container(codecs):
+    # Container a stream copy of these codecs can be written to, or None when it has to be re-encoded
+    for container, supported in COPY_CONTAINERS:
+        if codecs and set(codecs) <= supported:
+            return container
+    return None
+
+
+def probe(video_path, pass_fds=()):
+    """
+    (duration in seconds, video/audio codec names) of the video. The container
+    header is used when it has a duration; streamed WebM (what MediaRecorder
+    writes) has none, so the packets are then stream-copied to a null muxer and
+    the last timestamp taken. Raises ValueError when no length can be found.
+    """
+    header = subprocess.run(
+        [ffmpeg_exe(), '-nostdin', '-hide_banner', '-i', video_path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=pass_fds
+    ).stderr.decode('utf-8', 'replace')
+    codecs = parse_codecs(header)
+    found = _DURATION.findall(header)
+    if found and _seconds(found[0]) > 0:
+        return _seconds(found[0]), codecs
+
+    scan = subprocess.run(
+        [ffmpeg_exe(), '-nostdin', '-hide_banner', '-i', video_path, '-map', '0', '-c', 'copy', '-f', 'null', '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=pass_fds
+    )
+    found = _PROGRESS.findall(scan.stderr.decode('utf-8', 'replace'))
+    if found and _seconds(found[-1]) > 0:
+        return _seconds(found[-1]), codecs
+    raise ValueError("Could not determine the video's duration")
+
+
+def _args(operation):
+    args = operation.get("function_args") or {}
+    return json.loads(args) if isinstance(args, str) else args
+
+
+def _video_filter(name, args, duration):
+    # Same ffmpeg filters the browser path in src/app/utils.js uses
+    if name == "adjustBrightness":
+        brightness = float(args["brightness"])
+        brightness = brightness / 100 if brightness > 1 else brightness
+        return f"eq=brightness={brightness}"
+    if name == "applyColorGrading":
+        return f"eq=contrast={float(args['contrast'])}:gamma={float(args['gamma'])}:saturation={float(args['saturation'])}"
+    if name == "adjustSaturation":
+        return f"eq=contrast=1.0:gamma=1.0:saturation={float(args['saturation'])}"
+    if name == "addBlurEffect":
+        return f"gblur=sigma={float(args['blurStrength'])}"
+    if name == "convertToGrayscale":
+        return "hue=s=0"
+    if name == "applyFadeIn":
+        return f"fade=t=in:st=0:d={float(args['duration'])}"
+    if name == "applyFadeOut":
+        fade = float(args['duration'])
+        return f"fade=t=out:st={max(0.0, duration - fade)}:d={fade}"
+    raise ValueError(f"Unsupported function: {name}")
+
+
+def build_plan(operations, duration):
+    """
+    Fold a chain of AVAILABLE_FUNCTIONS calls on one clip into output segments.
+    trim_video narrows the window (each trim is relative to the one before, and
+    must stay inside it), cutClip (which must come last) splits it in
+    two, and every filter-only effect ends up in a single filter chain that is
+    applied in one encode per segment.
+
+    Returns [{"start", "end", "filters"}].
+    """
+    window_start, window_end = 0.0, duration
+    effects = []
+    cut_point = None
+
+    for operation in operations:
+        name = operation["function_name"]
+        args = _args(operation)
+        if cut_point is not None:
+            raise ValueError("cutClip must be the last operation in a render chain")
+        if name in TIMELINE_FUNCTIONS:
+            continue
+        if name == "trim_video":
+            start = float(args["start_time"])
+            end = float(args["end_time"])
+            if not 0 <= start < end:
+                raise ValueError(f"Invalid trim range {start}-{end}")
+            window_start, window_end = window_start + start, min(window_end, window_start + end)
+            # Trims are relative to the previous window and must land inside it
+            if not window_start < window_end:
+                raise ValueError(f"Trim range {start}-{end} is outside the clip")
+        elif name == "cutClip":
+            cut_point = float(args["cutPoint"])
+            if not 0 < cut_point < window_end - window_start:
+                raise ValueError(f"Cut point {cut_point} is outside the clip")
+        else:
+            effects.append((name, args))
+
+    if cut_point is None:
+        bounds = [(window_start, window_end)]
+    else:
+        bounds = [(window_start, window_start + cut_point), (window_start + cut_point, window_end)]
+
+    # Fades are placed relative to each output segment
+    return [{
+        "start": start,
+        "end": end,
+        "filters": [_video_filter(name, args, end - start) for name, args in effects]
+    } for start, end in bounds]
+
+
+def _command(input_path, segment, output_path, full_length, container=None):
+    command = [ffmpeg_exe(), '-nostdin', '-v', 'error', '-y']
+    trimmed = segment["start"] > 0 or not full_length
+    if trimmed:
+        command += ['-ss', f"{segment['start']:.3f}"]
+    command += ['-i', input_path]
+    if trimmed:
+        command += ['-t', f"{segment['end'] - segment['start']:.3f}"]
+
+    if segment["filters"] or container is None:
+        if segment["filters"]:
+            command += ['-vf', ','.join(segment["filters"])]
+        command += ENCODE_ARGS
+    else:
+        # Cuts and trims without effects are stream copies into `container`; they
+        # snap to the keyframe before the start
+        command += ['-c', 'copy', '-avoid_negative_ts', 'make_zero']
+        if container == "mp4":
+            command += ['-movflags', '+faststart']
+    return command + [output_path]
+
+
+def render(input_path, operations, output_dir, pass_fds=()):
+    """
+    Apply `operations` to the video at `input_path` and write the results to
+    `output_dir`. Returns one entry per output file. Encoded outputs are MP4;
+    stream copies keep a container their codecs fit in (WebM for VP8/VP9/Opus),
+    or are encoded when there is none.
+    """
+    duration, codecs = probe(input_path, pass_fds)
+    plan = build_plan(operations, duration)
+    container = copy_container(codecs)
+    outputs = []
+
+    for segment in plan:
+        copy = not segment["filters"] and container is not None
+        output_id = f"{uuid.uuid4().hex}.{container if copy else 'mp4'}"
+        output_path = os.path.join(output_dir, output_id)
+        full_length = segment["end"] >= duration
+        start = time.perf_counter()
+        result = subprocess.run(
+            _command(input_path, segment, output_path, full_length, container),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=pass_fds
+        )
+        if result.returncode != 0:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise RuntimeError(f"ffmpeg render failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+
+        outputs.append({
+            "output_id": output_id,
+            "start": round(segment["start"], 3),
+            "duration": round(segment["end"] - segment["start"], 3),
+            "mode": "copy" if copy else "encode",
+            "seconds": round(time.perf_counter() - start, 3)
+        })
+        logger.info(f"Rendered {output_id} ({outputs[-1]['mode']}) in {outputs[-1]['seconds']}s")
+
+    return outputs
+
+
+def remove_expired(output_dir, ttl):
+    now = time.time()
+    for name in os.listdir(output_dir):
+        path = os.path.join(output_dir, name)
+        try:
+            if now - os.path.getmtime(path) > ttl:
+                os.remove(path)
+        except OSError:
+            continue
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def _normalize(value):
+    # Whitespace-insensitive at the ends of strings and line-ending agnostic, so
+    # prompts assembled slightly differently still share a key
+    if isinstance(value, str):
+        return value.replace("\r\n", "\n").strip()
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def request_key(request):
+    """
+    sha256 over the canonical JSON of a chat completion request: model, messages,
+    function/tool schemas and every other parameter.
+    """
+    canonical = json.dumps(_normalize(request), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Bounded LRU of model responses with a TTL. Each entry remembers how long the
+    original call took, so hits can be reported as latency saved.
+    """
+
+    def __init__(self, max_entries=512, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    def get(self, key):
+        # (response, original latency) or None
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or now - entry[0] > self.ttl:
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.latency_saved += entry[2]
+            return entry[1], entry[2]
+
+    def put(self, key, response, latency):
+        with self.lock:
+            self.entries[key] = (time.time(), response, latency)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_call(self, request, call):
+        """
+        Returns (response, hit, latency). `call()` runs only on a miss. Failed
+        calls are not cached.
+        """
+        key = request_key(request)
+        cached = self.get(key)
+        if cached is not None:
+            return cached[0], True, cached[1]
+
+        start = time.perf_counter()
+        response = call()
+        latency = time.perf_counter() - start
+        self.put(key, response, latency)
+        return response, False, latency
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "latency_saved_seconds": round(self.latency_saved, 3)
+            }
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Seconds kept on each side of a matching second so the model sees some surroundings
+WINDOW_SECONDS = 2
+TOP_K = 8
+# Hits scoring below this fraction of the best hit are dropped
+MIN_RELATIVE_SCORE = 0.3
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "clip", "clips", "for", "from", "in", "into",
+    "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "video", "videos", "with",
+    "make", "apply", "add", "set", "please", "can", "you", "me", "my", "i", "so", "then", "all",
+    "frame", "shows", "there", "which", "while", "what", "who"
+}
+
+ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6, "seventh": 7,
+    "eighth": 8, "ninth": 9, "tenth": 10, "eleventh": 11, "twelfth": 12
+}
+
+_ORDINAL_PATTERN = re.compile(
+    r"\b(" + "|".join(ORDINALS) + r"|last|\d+(?:st|nd|rd|th))\s+(?:video\s+)?clip\b", re.IGNORECASE
+)
+_NUMBER_PATTERN = re.compile(r"\bclip\s*(?:#|number\s*|no\.?\s*)?(\d+)\b", re.IGNORECASE)
+
+
+def tokenize(text):
+    return [word for word in re.findall(r"[a-z0-9']+", str(text).lower()) if word not in STOPWORDS]
+
+
+class ClipIndex:
+    """
+    BM25 index with one document per (clip, second), holding that second's image
+    description and transcription. Clips are numbered by timeline position
+    (sorted by start), matching how the planner refers to "the third clip".
+    """
+
+    def __init__(self, contexts):
+        self.contexts = contexts
+        self.order = sorted(range(len(contexts)), key=lambda i: (contexts[i].get("start", 0), i))
+        self.documents = []
+        self.postings = defaultdict(list)
+
+        for clip in range(len(contexts)):
+            context = contexts[clip]
+            descriptions = context.get("imageDescriptions") or []
+            transcription = context.get("transcription") or []
+            for second in range(max(len(descriptions), len(transcription))):
+                text = ' '.join(str(values[second]) for values in (descriptions, transcription)
+                                if second < len(values) and values[second])
+                terms = Counter(tokenize(text))
+                if not terms:
+                    continue
+                doc = len(self.documents)
+                self.documents.append((clip, second, sum(terms.values())))
+                for term, count in terms.items():
+                    self.postings[term].append((doc, count))
+
+        total_length = sum(length for _, _, length in self.documents)
+        self.average_length = total_length / len(self.documents) if self.documents else 0
+
+    def search(self, query, top_k=TOP_K):
+        # [(score, clip, second)] best first
+        count = len(self.documents)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, frequency in postings:
+                length = self.documents[doc][2]
+                norm = frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / self.average_length))
+                scores[doc] += idf * norm
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [(score, self.documents[doc][0], self.documents[doc][1]) for doc, score in ranked]
+
+    def referenced_clips(self, query):
+        # Clips named by position ("the third clip", "clip 2") or by clip_id
+        clips = set()
+        for match in _ORDINAL_PATTERN.finditer(query):
+            word = match.group(1).lower()
+            if word == "last":
+                position = len(self.order)
+            else:
+                position = ORDINALS.get(word) or int(re.sub(r"\D", "", word))
+            if 1 <= position <= len(self.order):
+                clips.add(self.order[position - 1])
+        for match in _NUMBER_PATTERN.finditer(query):
+            position = int(match.group(1))
+            if 1 <= position <= len(self.order):
+                clips.add(self.order[position - 1])
+        for clip, context in enumerate(self.contexts):
+            clip_id = str(context.get("clip_id", ""))
+            if clip_id and clip_id != "unknown" and clip_id in query:
+                clips.add(clip)
+        return clips
+
+    def focus(self, query):
+        """
+        {clip: None (whole clip) or set of seconds} worth sending for `query`, or
+        None when nothing stands out and the whole timeline should be sent.
+        """
+        focus = {clip: None for clip in self.referenced_clips(query)}
+
+        hits = self.search(query)
+        if hits:
+            best = hits[0][0]
+            for score, clip, second in hits:
+                if score < best * MIN_RELATIVE_SCORE or (clip in focus and focus[clip] is None):
+                    continue
+                seconds = focus.setdefault(clip, set())
+                seconds.update(range(max(0, second - WINDOW_SECONDS), second + WINDOW_SECONDS + 1))
+
+        return focus or None
+
+
+def _clip_key(context):
+    """
+    What a clip contributes to its index: its id, position and which seconds of
+    which preprocess result it holds. Clips without the result's content_hash
+    fall back to hashing their own text.
+    """
+    descriptions = context.get("imageDescriptions") or []
+    transcription = context.get("transcription") or []
+    content = context.get("content_hash")
+    if content is None:
+        content = hashlib.sha1(json.dumps([descriptions, transcription], default=str).encode('utf-8')).hexdigest()
+    return (str(context.get("clip_id")), context.get("start", 0), context.get("offset", 0),
+            len(descriptions), len(transcription), content)
+
+
+class IndexCache:
+    # Indexes keyed by the clips they were built from, so each timeline is indexed once
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, contexts):
+        key = tuple(_clip_key(context) for context in contexts)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        index = ClipIndex(contexts)
+        with self.lock:
+            self.entries[key] = index
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return index
@@ -0,0 +1,293 @@
+import math
+
+import cv2
+import numpy as np
+
+# Sample intervals at or above this many seconds are cheaper to reach by
+# seeking than by grabbing every frame in between.
+SEEK_MIN_INTERVAL = 2.0
+
+# Adaptive mode scores changes on tiny thumbnails of this size
+THUMBNAIL_SIZE = (64, 36)
+
+
+def sample_interval(frames_per_second=None, every_seconds=None):
+    """
+    Resolve a sampling rate given as N frames per second or one frame every K seconds
+    into an interval in seconds. Defaults to one frame per second.
+    """
+    if frames_per_second and every_seconds:
+        raise ValueError("Specify either frames_per_second or every_seconds, not both")
+
+    if every_seconds:
+        interval = float(every_seconds)
+    elif frames_per_second:
+        interval = 1.0 / float(frames_per_second)
+    else:
+        interval = 1.0
+
+    if interval <= 0:
+        raise ValueError("Sampling interval must be positive")
+    return interval
+
+
+def per_second_slots(slot_count, interval, seconds=None):
+    """
+    Map `slot_count` samples taken every `interval` seconds onto the one entry per
+    second that clip_context and the editor index by. Returns, for each second,
+    the indexes of the samples inside it, or of the latest sample before it when
+    samples are more than a second apart. `seconds` defaults to the span the
+    samples cover.
+    """
+    if not slot_count:
+        return []
+    if seconds is None:
+        seconds = math.ceil(slot_count * interval - 1e-9)
+
+    mapping = []
+    for second in range(seconds):
+        first = math.ceil(second / interval - 1e-9)
+        end = min(slot_count, math.ceil((second + 1) / interval - 1e-9))
+        if first < end:
+            mapping.append(list(range(first, end)))
+        else:
+            mapping.append([min(slot_count - 1, math.floor(second / interval + 1e-9))])
+    return mapping
+
+
+def _frame_time(cap, index, fps):
+    # Container timestamps keep variable-frame-rate files aligned; fall back to
+    # index / fps for backends that do not report them.
+    pos_msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+    if pos_msec > 0 or index == 0:
+        return pos_msec / 1000.0
+    return index / fps if fps else 0.0
+
+
+def _grab_frames(cap, interval, fps):
+    tolerance = 0.5 / fps if fps else 0.0
+    slot = 0
+    index = 0
+
+    while cap.grab():
+        timestamp = _frame_time(cap, index, fps)
+        index += 1
+        if timestamp + tolerance < slot * interval:
+            continue
+
+        # Only the frames we keep pay for colour conversion and the copy out
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+
+        # A variable-frame-rate gap can span several slots; fill each of them
+        # so the caller's timeline stays contiguous.
+        while slot * interval <= timestamp + tolerance:
+            yield slot * interval, frame
+            slot += 1
+
+
+def _seek_frames(cap, interval, fps):
+    frame_total = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    duration = frame_total / fps if fps and frame_total > 0 else 0
+    slot = 0
+
+    while not duration or slot * interval < duration:
+        cap.set(cv2.CAP_PROP_POS_MSEC, slot * interval * 1000)
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield slot * interval, frame
+        slot += 1
+
+
+def iter_sampled_frames(video_path, interval=1.0, mode="auto"):
+    """
+    Yield (timestamp, frame) for one frame every `interval` seconds of `video_path`.
+
+    mode "grab" walks the stream with grab() and only retrieves the frames it keeps,
+    "seek" jumps straight to each sample time, and "auto" seeks when samples are
+    far enough apart for the skipped decode to outweigh the cost of a seek.
+    """
+    if mode == "auto":
+        mode = "seek" if interval >= SEEK_MIN_INTERVAL else "grab"
+    if mode not in ("grab", "seek"):
+        raise ValueError(f"Unknown sampling mode: {mode}")
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        if mode == "seek":
+            yield from _seek_frames(cap, interval, fps)
+        else:
+            yield from _grab_frames(cap, interval, fps)
+    finally:
+        cap.release()
+
+
+def _probe_duration(video_path):
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        frame_total = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        return frame_total / fps if fps and frame_total > 0 else 0.0
+    finally:
+        cap.release()
+
+
+def frame_size(video_path):
+    # (width, height) of the video's frames, or None when it can't be read
+    cap = cv2.VideoCapture(video_path)
+    try:
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return (width, height) if width and height else None
+    finally:
+        cap.release()
+
+
+def _shrink(frame, long_edge):
+    height, width = frame.shape[:2]
+    scale = long_edge / max(height, width) if long_edge else 1
+    if scale >= 1:
+        return frame
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def decode_segment(video_path, interval, first_slot, end_slot, long_edge=0):
+    """
+    Worker entry point: decode slots [first_slot, end_slot) of `video_path` with
+    its own capture. Frames are shrunk to `long_edge` before they are returned
+    so less data crosses the process boundary.
+    """
+    cap = cv2.VideoCapture(video_path)
+    samples = []
+    try:
+        if not cap.isOpened():
+            return samples
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        tolerance = 0.5 / fps if fps else 0.0
+        slot = first_slot
+
+        if interval >= SEEK_MIN_INTERVAL:
+            while slot < end_slot:
+                cap.set(cv2.CAP_PROP_POS_MSEC, slot * interval * 1000)
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                samples.append((slot * interval, _shrink(frame, long_edge)))
+                slot += 1
+            return samples
+
+        if first_slot:
+            cap.set(cv2.CAP_PROP_POS_MSEC, first_slot * interval * 1000)
+        while slot < end_slot and cap.grab():
+            timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if timestamp + tolerance < slot * interval:
+                continue
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            frame = _shrink(frame, long_edge)
+            while slot < end_slot and slot * interval <= timestamp + tolerance:
+                samples.append((slot * interval, frame))
+                slot += 1
+        return samples
+    finally:
+        cap.release()
+
+
+def iter_segmented_frames(video_path, interval, pool, workers, long_edge=0, segments_per_worker=2):
+    """
+    Yield (timestamp, frame) like iter_sampled_frames, with the timeline split
+    into contiguous segments that `pool` (a ProcessPoolExecutor of `workers`
+    processes) decodes in parallel. Segments are yielded in timeline order as
+    soon as each one and all before it are done. `video_path` must be openable
+    from the worker processes.
+    """
+    duration = _probe_duration(video_path)
+    if not duration:
+        # Unknown length can't be split; decode serially
+        for timestamp, frame in iter_sampled_frames(video_path, interval):
+            yield timestamp, _shrink(frame, long_edge)
+        return
+
+    slots = math.ceil(duration / interval - 1e-9)
+    count = max(1, min(slots, workers * segments_per_worker))
+    bounds = [round(i * slots / count) for i in range(count + 1)]
+    futures = [
+        pool.submit(decode_segment, video_path, interval, first, end, long_edge)
+        for first, end in zip(bounds[:-1], bounds[1:])
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _thumbnail(frame):
+    return cv2.resize(frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def change_score(prev_thumbnail, thumbnail):
+    # Mean absolute per-channel difference, 0 (identical) to 255
+    return float(np.mean(np.abs(thumbnail - prev_thumbnail)))
+
+
+def iter_adaptive_frames(video_path, interval=1.0, scene_threshold=30.0, max_gap=5.0, analysis_fps=5.0):
+    """
+    Yield (timestamp, frame, key_frames) for every `interval` slot of `video_path`.
+
+    Frames are scored for change at roughly `analysis_fps`. key_frames holds the shot
+    boundaries found since the previous slot (at most the first and last), the slot
+    frame itself when nothing was picked for `max_gap` seconds, or is empty when the
+    slot can reuse the previous description.
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        step = max(1, int(round(fps / analysis_fps))) if fps else 1
+        tolerance = 0.5 / fps if fps else 0.0
+
+        slot = 0
+        index = 0
+        prev_thumbnail = None
+        boundaries = []
+        last_key_time = None
+
+        while cap.grab():
+            timestamp = _frame_time(cap, index, fps)
+            is_slot = timestamp + tolerance >= slot * interval
+            is_analysed = index % step == 0
+            index += 1
+            if not (is_slot or is_analysed):
+                continue
+
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+
+            thumbnail = _thumbnail(frame)
+            if prev_thumbnail is None or change_score(prev_thumbnail, thumbnail) >= scene_threshold:
+                # Keep the first and latest boundary since the last slot
+                boundaries = boundaries[:1] + [frame]
+            prev_thumbnail = thumbnail
+
+            while slot * interval <= timestamp + tolerance:
+                key_frames = boundaries
+                if not key_frames and (last_key_time is None or slot * interval - last_key_time >= max_gap):
+                    key_frames = [frame]
+                if key_frames:
+                    last_key_time = slot * interval
+                    boundaries = []
+                yield slot * interval, frame, key_frames
+                slot += 1
+    finally:
+        cap.release()
@@ -0,0 +1,205 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Limits for models without an entry of their own: as many concurrent calls as a
+# default ThreadPoolExecutor has workers, and no rate limit (rate None) until
+# MODEL_LIMITS sets one
+DEFAULT_LIMITS = {
+    "concurrency": min(32, (os.cpu_count() or 1) + 4),
+    "rate": None,  # requests per second
+    "burst": 5
+}
+
+RETRY_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Returns the seconds spent waiting for a token
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _ModelLane:
+    def __init__(self, limits):
+        self.semaphore = threading.BoundedSemaphore(limits["concurrency"])
+        self.bucket = TokenBucket(limits["rate"], limits["burst"]) if limits["rate"] else None
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.queue_wait = 0.0
+        self.latencies = deque(maxlen=1000)
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+
+            def percentile(p):
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "queue_wait_seconds": round(self.queue_wait, 3),
+                "latency_p50": percentile(0.5),
+                "latency_p95": percentile(0.95),
+                "latency_max": round(latencies[-1], 3) if latencies else None
+            }
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ModelScheduler:
+    """
+    Shared gate for model API calls. Each model gets its own concurrency cap and
+    token-bucket rate limit; 429s, 5xx responses and connection errors are retried
+    with jittered exponential backoff, honouring Retry-After when the API sends it.
+    on_call(model, seconds, result, error), when given, is told about every attempt.
+    """
+
+    def __init__(self, limits=None, max_retries=5, base_delay=0.5, max_delay=20.0, retry_on=(), on_call=None):
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = tuple(retry_on)
+        self.on_call = on_call
+        self.lanes = {}
+        self.lock = threading.Lock()
+
+    def _lane(self, model):
+        with self.lock:
+            if model not in self.lanes:
+                self.lanes[model] = _ModelLane({**DEFAULT_LIMITS, **self.limits.get(model, {})})
+            return self.lanes[model]
+
+    def _should_retry(self, error):
+        status = getattr(error, "status_code", None)
+        if status is not None:
+            return status in RETRY_STATUS_CODES
+        return isinstance(error, self.retry_on + (ConnectionError, TimeoutError))
+
+    def call(self, model, fn, /, *args, **kwargs):
+        lane = self._lane(model)
+        attempt = 0
+
+        while True:
+            wait_start = time.perf_counter()
+            with lane.semaphore:
+                if lane.bucket is not None:
+                    lane.bucket.acquire()
+                start = time.perf_counter()
+                try:
+                    result = fn(*args, **kwargs)
+                    error = None
+                except Exception as e:
+                    error = e
+                latency = time.perf_counter() - start
+
+            with lane.lock:
+                lane.calls += 1
+                lane.queue_wait += start - wait_start
+                lane.latencies.append(latency)
+                if error is not None:
+                    lane.errors += 1
+            if self.on_call is not None:
+                self.on_call(model, latency, result if error is None else None, error)
+
+            if error is None:
+                return result
+            if attempt >= self.max_retries or not self._should_retry(error):
+                raise error
+
+            delay = _retry_after(error)
+            if delay is None:
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            attempt += 1
+            with lane.lock:
+                lane.retries += 1
+            logger.warning(f"Retrying {model} call in {delay:.2f}s after: {error}")
+            time.sleep(delay)
+
+    def add_retry_on(self, *errors):
+        # For error types that are only known once their library is imported
+        self.retry_on = self.retry_on + tuple(error for error in errors if error not in self.retry_on)
+
+    def wrap(self, client):
+        return ScheduledClient(client, self)
+
+    def stats(self):
+        with self.lock:
+            lanes = dict(self.lanes)
+        return {model: lane.stats() for model, lane in lanes.items()}
+
+
+class _ScheduledCreate:
+    def __init__(self, scheduler, get_create):
+        self.scheduler = scheduler
+        self._get_create = get_create
+
+    def create(self, **kwargs):
+        return self.scheduler.call(kwargs.get("model"), self._get_create(), **kwargs)
+
+
+class _Namespace:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class ScheduledClient:
+    """
+    Stands in for an OpenAI client so existing call sites
+    (client.chat.completions.create, client.audio.transcriptions.create) go
+    through the scheduler unchanged. `client` may also be a zero-argument factory,
+    called on first use.
+    """
+
+    def __init__(self, client, scheduler):
+        self._client = client
+        self._lazy = not hasattr(client, "chat")
+        self._lock = threading.Lock()
+        self.chat = _Namespace(completions=_ScheduledCreate(scheduler, lambda: self.client.chat.completions.create))
+        self.audio = _Namespace(transcriptions=_ScheduledCreate(scheduler, lambda: self.client.audio.transcriptions.create))
+
+    @property
+    def client(self):
+        if self._lazy:
+            with self._lock:
+                if self._lazy:
+                    self._client = self._client()
+                    self._lazy = False
+        return self._client
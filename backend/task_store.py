@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryTaskStore:
+    """
+    Tasks in a process-local dict. Ids come from a locked counter and each task
+    has its own lock, so concurrent requests for different tasks don't contend.
+    Tasks idle for longer than `ttl` seconds are dropped, as are the least
+    recently used ones past `max_tasks`.
+    """
+
+    def __init__(self, ttl=86400, max_tasks=10000):
+        self.ttl = ttl
+        self.max_tasks = max_tasks
+        self.tasks = OrderedDict()
+        self.task_locks = {}
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def _evict(self, now):
+        while self.tasks:
+            task_id, task = next(iter(self.tasks.items()))
+            if len(self.tasks) <= self.max_tasks and now - task["updated_at"] <= self.ttl:
+                break
+            del self.tasks[task_id]
+            self.task_locks.pop(task_id, None)
+
+    def create(self, steps):
+        now = time.time()
+        with self.lock:
+            task_id = self.next_id
+            self.next_id += 1
+            self.tasks[task_id] = {"task_id": task_id, "steps": list(steps), "current_step": -1, "updated_at": now}
+            self.task_locks[task_id] = threading.Lock()
+            self._evict(now)
+            return self._public(self.tasks.get(task_id))
+
+    def _lookup(self, task_id):
+        # Every access counts as use, so the dict stays ordered by updated_at for _evict
+        now = time.time()
+        with self.lock:
+            self._evict(now)
+            task = self.tasks.get(task_id)
+            if task is None:
+                return None, None
+            task["updated_at"] = now
+            self.tasks.move_to_end(task_id)
+            return task, self.task_locks[task_id]
+
+    @staticmethod
+    def _public(task):
+        return None if task is None else {key: value for key, value in task.items() if key != "updated_at"}
+
+    def get(self, task_id):
+        task, task_lock = self._lookup(task_id)
+        if task is None:
+            return None
+        with task_lock:
+            return self._public(task)
+
+    def advance(self, task_id):
+        # Atomically move to the next step and return the updated task
+        task, task_lock = self._lookup(task_id)
+        if task is None:
+            return None
+        with task_lock:
+            task["current_step"] += 1
+            return self._public(task)
+
+    def set_current_step(self, task_id, step):
+        task, task_lock = self._lookup(task_id)
+        if task is None:
+            return None
+        with task_lock:
+            task["current_step"] = step
+            return self._public(task)
+
+    def delete(self, task_id):
+        with self.lock:
+            self.tasks.pop(task_id, None)
+            self.task_locks.pop(task_id, None)
+
+
+class SQLiteTaskStore:
+    """
+    Tasks in a SQLite file shared by every worker process. Ids come from
+    AUTOINCREMENT and step updates run in IMMEDIATE transactions, so they stay
+    atomic across processes. Same eviction rules as MemoryTaskStore.
+    """
+
+    def __init__(self, path, ttl=86400, max_tasks=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_tasks = max_tasks
+        self.local = threading.local()
+        self._connect().db.execute("PRAGMA journal_mode=WAL")
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "task_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "steps TEXT NOT NULL, "
+                "current_step INTEGER NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS tasks_updated_at ON tasks (updated_at)")
+
+    def _connect(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self.local.db = db
+        return _Transaction(db)
+
+    def _evict(self, db, now):
+        db.execute("DELETE FROM tasks WHERE updated_at < ?", (now - self.ttl,))
+        db.execute(
+            "DELETE FROM tasks WHERE task_id IN ("
+            "SELECT task_id FROM tasks ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_tasks,)
+        )
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        return {"task_id": row[0], "steps": json.loads(row[1]), "current_step": row[2]}
+
+    def create(self, steps):
+        now = time.time()
+        with self._connect() as db:
+            cursor = db.execute(
+                "INSERT INTO tasks (steps, current_step, updated_at) VALUES (?, -1, ?)",
+                (json.dumps(list(steps)), now)
+            )
+            task_id = cursor.lastrowid
+            self._evict(db, now)
+        return {"task_id": task_id, "steps": list(steps), "current_step": -1}
+
+    def _fetch(self, db, task_id):
+        return self._row(db.execute(
+            "SELECT task_id, steps, current_step FROM tasks WHERE task_id = ? AND updated_at >= ?",
+            (task_id, time.time() - self.ttl)
+        ).fetchone())
+
+    def _update(self, task_id, expression="current_step", params=()):
+        # Reads touch updated_at too, so recency means last use as in MemoryTaskStore
+        with self._connect() as db:
+            if self._fetch(db, task_id) is None:
+                return None
+            db.execute(
+                f"UPDATE tasks SET current_step = {expression}, updated_at = ? WHERE task_id = ?",
+                params + (time.time(), task_id)
+            )
+            return self._fetch(db, task_id)
+
+    def get(self, task_id):
+        return self._update(task_id)
+
+    def advance(self, task_id):
+        return self._update(task_id, "current_step + 1")
+
+    def set_current_step(self, task_id, step):
+        return self._update(task_id, "?", (step,))
+
+    def delete(self, task_id):
+        with self._connect() as db:
+            db.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+
+class _Transaction:
+    # BEGIN IMMEDIATE takes the write lock up front so read-modify-write is atomic
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def create_task_store(url, ttl=86400, max_tasks=10000):
+    """
+    'memory' for a single process, or 'sqlite:///path/to/tasks.db' to share tasks
+    between worker processes.
+    """
+    if url == "memory":
+        return MemoryTaskStore(ttl, max_tasks)
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        return SQLiteTaskStore(path, ttl, max_tasks)
+    raise ValueError(f"Unknown task store: {url}")
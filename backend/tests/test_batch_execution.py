@@ -0,0 +1,51 @@
+import json
+from types import SimpleNamespace
+
+import batch_execution
+
+
+def tool_call(name, **args):
+    return SimpleNamespace(function=SimpleNamespace(name=name, arguments=json.dumps(args)))
+
+
+CLIPS = [{"clip_id": "100", "start": 0, "duration": 10}, {"clip_id": "200", "start": 10, "duration": 5}]
+
+
+def test_cut_creates_placeholder_ids_for_later_calls():
+    calls = batch_execution.resolve_calls([
+        tool_call("cutClip", clipId="100", cutPoint=4),
+        tool_call("convertToGrayscale", clipId="100.2"),
+        tool_call("deleteClip", clipId="100.1")
+    ], CLIPS, ["cut", "grayscale", "delete"])
+
+    assert calls[0]["creates"] == ["100.1", "100.2"]
+    assert [call["message"] for call in calls] == ["cut", "grayscale", "delete"]
+    assert all("warning" not in call for call in calls)
+
+
+def test_call_on_a_clip_that_was_cut_is_flagged():
+    calls = batch_execution.resolve_calls([
+        tool_call("cutClip", clipId="100", cutPoint=4),
+        tool_call("adjustBrightness", clipId="100", brightness=0.2)
+    ], CLIPS, ["cut", "brighten"])
+
+    assert "warning" in calls[1]
+
+
+def test_deleted_and_unknown_clips_are_flagged():
+    calls = batch_execution.resolve_calls([
+        tool_call("deleteClip", clipId="200"),
+        tool_call("moveClip", clipId="200", start=3),
+        tool_call("moveClip", clipId="300", start=3)
+    ], CLIPS, ["delete", "move", "move"])
+
+    assert "warning" not in calls[0]
+    assert "warning" in calls[1] and "warning" in calls[2]
+
+
+def test_messages_are_left_out_when_calls_do_not_match_steps():
+    calls = batch_execution.resolve_calls([tool_call("convertToGrayscale", clipId=100)], CLIPS, ["a", "b"])
+
+    assert calls[0]["message"] is None
+    assert calls[0]["creates"] == []
+    assert "warning" not in calls[0]
@@ -0,0 +1,93 @@
+import json
+
+import clip_context
+
+
+def _context(clip_id, seconds, words=30):
+    # Every second differs so nothing collapses into a longer range
+    return {
+        "clip_id": clip_id,
+        "mediaId": "media-" + clip_id,
+        "start": 0,
+        "duration": seconds,
+        "imageDescriptions": [" ".join(f"d{second}w{i}" for i in range(words)) for second in range(seconds)],
+        "transcription": [f"spoken line {second} of the clip" for second in range(seconds)],
+        "imageAttributes": [
+            {"rgb_level": {"Red": second % 200, "Green": 10, "Blue": 10},
+             "saturation": 50, "contrast": 50, "brightness": 50}
+            for second in range(seconds)
+        ]
+    }
+
+
+def test_repeated_seconds_collapse_into_ranges():
+    context = {
+        "clip_id": "a", "duration": 4,
+        "imageDescriptions": ["a dog on grass"] * 3 + ["a cat"],
+        "transcription": ["hello", "hello", "", "bye"],
+        "imageAttributes": []
+    }
+    text, stats = clip_context.build_context([context])
+    clip = json.loads(text)["clips"][0]
+
+    assert clip["imageDescriptions"] == [[1, 3, "a dog on grass"], [4, 4, "a cat"]]
+    assert clip["transcription"] == [[1, 2, "hello"], [4, 4, "bye"]]
+    assert stats["compaction_level"] == 0
+
+
+def test_no_budget_keeps_full_detail():
+    text, stats = clip_context.build_context([_context("a", 30)])
+
+    assert stats["compaction_level"] == 0
+    assert stats["range_stride"] == 1
+    assert stats["within_budget"]
+    assert stats["tokens"] < stats["legacy_tokens"]
+
+
+def test_levels_get_lossier_as_the_budget_shrinks():
+    contexts = [_context("a", 60)]
+    _, full = clip_context.build_context(contexts)
+    _, tight = clip_context.build_context(contexts, full["tokens"] // 2)
+
+    assert tight["compaction_level"] > 0
+    assert tight["within_budget"]
+    assert tight["tokens"] <= full["tokens"] // 2
+
+
+def test_long_transcripts_are_trimmed_to_fit():
+    # Three 10-minute clips stay over budget on descriptions and transcripts alone
+    contexts = [_context(str(i), 600) for i in range(3)]
+    text, stats = clip_context.build_context(contexts, 16000)
+
+    assert stats["within_budget"]
+    assert stats["tokens"] <= 16000
+    assert stats["compaction_level"] == len(clip_context.COMPACTION_LEVELS) - 1
+    assert stats["range_stride"] > 1
+    clip = json.loads(text)["clips"][0]
+    # Kept ranges still say which seconds they describe
+    assert clip["transcription"][1][0] == stats["range_stride"] + 1
+
+
+def test_tiny_budget_falls_back_to_summaries():
+    contexts = [_context(str(i), 60) for i in range(3)]
+    text, stats = clip_context.build_context(contexts, 200)
+
+    assert stats["compaction_level"] == len(clip_context.COMPACTION_LEVELS)
+    assert stats["within_budget"]
+    assert all("summary" in clip for clip in json.loads(text)["clips"])
+
+
+def test_impossible_budget_is_reported():
+    _, stats = clip_context.build_context([_context(str(i), 5) for i in range(3)], 10)
+
+    assert not stats["within_budget"]
+
+
+def test_unfocused_clips_become_summaries():
+    contexts = [_context("a", 10), _context("b", 10)]
+    text, stats = clip_context.build_context(contexts, focus={1: {2, 3}})
+    clips = json.loads(text)["clips"]
+
+    assert "summary" in clips[0]
+    assert [r[0] for r in clips[1]["transcription"]] == [3, 4]
+    assert stats["focused_clips"] == 1
@@ -0,0 +1,39 @@
+import gzip
+
+import pytest
+
+import columnar
+
+
+def test_gzip_body_round_trip():
+    assert columnar.read_json(gzip.compress(b'{"type": "new_chat"}'), 'gzip') == {"type": "new_chat"}
+
+
+def test_gzip_body_past_limit_is_refused():
+    bomb = gzip.compress(b'{"a": "' + b'x' * 2 ** 22 + b'"}')
+
+    with pytest.raises(columnar.PayloadTooLarge):
+        columnar.read_json(bomb, 'gzip', max_bytes=2 ** 20)
+
+
+def test_truncated_gzip_body():
+    with pytest.raises(ValueError):
+        columnar.decompress(gzip.compress(b'{"a": 1}')[:-4], 'gzip')
+
+
+def test_brotli_body_past_limit_is_refused():
+    brotli = pytest.importorskip("brotli")
+    bomb = brotli.compress(b'x' * 2 ** 22)
+
+    with pytest.raises(columnar.PayloadTooLarge):
+        columnar.decompress(bomb, 'br', max_bytes=2 ** 20)
+
+
+def test_attributes_round_trip():
+    attrs = [
+        {"rgb_level": {"Red": 0.5, "Green": 0.25, "Blue": 1.0}, "saturation": 0.5, "contrast": 2.0,
+         "brightness": 0.75, "blur": 10.0, "color_grading": [0.5, -0.5]},
+        None
+    ]
+
+    assert columnar.decode_attributes(columnar.encode_attributes(attrs)) == attrs
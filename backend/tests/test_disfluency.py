@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import disfluency
+
+
+def timed(text, start=0.0, length=0.3, pause=0.05):
+    words = []
+    for word in text.split():
+        words.append({"word": word, "start": round(start, 3), "end": round(start + length, 3)})
+        start += length + pause
+    return words
+
+
+def kinds(result):
+    return [kind for candidate in result["candidates"] for kind in candidate["kind"]]
+
+
+def test_fluent_speech_has_no_broken_words():
+    result = disfluency.detect(timed("we were going to find an answer on one hand"))
+
+    assert result["candidates"] == []
+    assert result["removed_seconds"] == 0
+
+
+def test_whisper_marked_fragment_is_broken_word():
+    words = timed("it was b- but then")
+    result = disfluency.detect(words)
+
+    assert kinds(result) == ["broken_word"]
+    assert result["candidates"][0]["start_time"] == words[2]["start"]
+    assert result["candidates"][0]["end_time"] == words[3]["start"]
+
+
+def test_repeated_restart_is_broken_word():
+    words = timed("it was b b but then")
+    result = disfluency.detect(words)
+
+    assert result["candidates"][0]["kind"] == ["repetition", "broken_word"]
+    assert result["candidates"][0]["start_time"] == words[2]["start"]
+    assert result["candidates"][0]["end_time"] == words[4]["start"]
+
+
+def test_repetition_keeps_last_copy():
+    words = timed("I was I was going")
+    result = disfluency.detect(words)
+
+    assert kinds(result) == ["repetition"]
+    assert result["candidates"][0]["start_time"] == words[0]["start"]
+    assert result["candidates"][0]["end_time"] == words[2]["start"]
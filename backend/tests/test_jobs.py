@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from jobs import JobManager, QueueFull
+
+RESULT = {"image_description": ["a", "b"], "image_attr": [{}, {}], "transcription": ["", "hi"]}
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield executor
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_partial_results_then_completion(executor):
+    manager = JobManager(executor, max_pending=2)
+    reported = threading.Event()
+    release = threading.Event()
+
+    def run(job):
+        job.record_frame(1, "b", {})
+        reported.set()
+        release.wait(5)
+        return RESULT, {}
+
+    job = manager.submit(run, expected_frames=2)
+    assert reported.wait(5)
+    status = job.status_dict()
+    assert status["status"] == "running"
+    assert (status["frames_done"], status["frames_total"], status["progress"]) == (1, 2, 0.5)
+    assert job.results_dict()["image_description"] == [None, "b"]
+
+    release.set()
+    job.future.result(5)
+    assert job.status_dict()["status"] == "completed"
+    assert job.status_dict()["transcription_ready"]
+    assert job.results_dict()["image_description"] == ["a", "b"]
+    assert manager.get(job.job_id) is job
+
+
+def test_failed_job_keeps_the_error(executor):
+    manager = JobManager(executor, max_pending=2)
+
+    def run(job):
+        raise RuntimeError("decode failed")
+
+    job = manager.submit(run)
+    job.future.result(5)
+    assert job.status_dict()["status"] == "failed"
+    assert job.status_dict()["error"] == "decode failed"
+
+
+def test_queue_is_bounded(executor):
+    manager = JobManager(executor, max_pending=2)
+    release = threading.Event()
+
+    def run(job):
+        release.wait(5)
+        return RESULT, {}
+
+    manager.submit(run)
+    manager.submit(run)
+    with pytest.raises(QueueFull):
+        manager.submit(run)
+    release.set()
+
+
+def test_cancel_queued_and_running_jobs(executor):
+    manager = JobManager(executor, max_pending=2)
+    cleaned = []
+    started = threading.Event()
+
+    def cancellable(job):
+        started.set()
+        job.cancel_event.wait(5)
+        raise RuntimeError("stopped")
+
+    running = manager.submit(cancellable)
+    assert started.wait(5)
+    queued = manager.submit(lambda job: (RESULT, {}), cleanup=lambda: cleaned.append("queued"))
+
+    # The queued job never reaches the worker but is still cleaned up
+    manager.cancel(queued.job_id)
+    assert queued.status_dict()["status"] == "cancelled"
+    assert cleaned == ["queued"]
+
+    manager.cancel(running.job_id)
+    running.future.result(5)
+    assert running.status_dict()["status"] == "cancelled"
+    assert manager.cancel("missing") is None
+
+
+def test_finished_jobs_expire(executor):
+    manager = JobManager(executor, max_pending=1, ttl=0)
+    job = manager.submit(lambda job: (RESULT, {}))
+    job.future.result(5)
+    job.finished_at -= 1
+
+    # Pruned on the next submit, which also frees the pending slot
+    manager.submit(lambda job: (RESULT, {})).future.result(5)
+    assert manager.get(job.job_id) is None
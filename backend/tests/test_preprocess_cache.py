@@ -0,0 +1,71 @@
+import os
+
+import preprocess_cache
+from preprocess_cache import PreprocessCache, cache_key
+
+
+def test_key_covers_content_and_params():
+    key = cache_key("abc", interval=1.0, vision_model="m")
+
+    assert key == cache_key("abc", vision_model="m", interval=1.0)
+    assert key != cache_key("abd", interval=1.0, vision_model="m")
+    assert key != cache_key("abc", interval=0.5, vision_model="m")
+    assert key != cache_key("abc", interval=1.0, vision_model="m", seconds=5)
+
+
+def test_version_bump_invalidates_keys(monkeypatch):
+    key = cache_key("abc", interval=1.0)
+    monkeypatch.setattr(preprocess_cache, "CACHE_VERSION", preprocess_cache.CACHE_VERSION + 1)
+
+    assert cache_key("abc", interval=1.0) != key
+
+
+def test_hash_file(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"x" * 3000)
+
+    assert preprocess_cache.hash_file(str(path), chunk_size=1024) == preprocess_cache.hash_file(str(path))
+
+
+def test_put_then_get(tmp_path):
+    cache = PreprocessCache(str(tmp_path), 1 << 20)
+    result = {"image_description": ["a dog"], "transcription": [""]}
+
+    assert cache.get("k") is None
+    cache.put("k", result)
+    assert cache.get("k") == result
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "hit_rate": 0.5}
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = PreprocessCache(str(tmp_path), 1 << 20)
+    (tmp_path / "k.json").write_text("{not json")
+
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = PreprocessCache(str(tmp_path), 1 << 20)
+    cache.put("a", {"value": "a"})
+    cache.max_bytes = 2 * os.path.getsize(tmp_path / "a.json")
+    cache.put("b", {"value": "b"})
+    os.utime(tmp_path / "a.json", (100, 100))
+    os.utime(tmp_path / "b.json", (200, 200))
+
+    # A hit refreshes the mtime, so "b" becomes the oldest
+    assert cache.get("a") == {"value": "a"}
+    cache.put("c", {"value": "c"})
+
+    assert sorted(os.listdir(tmp_path)) == ["a.json", "c.json"]
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_eviction_ignores_other_files(tmp_path):
+    (tmp_path / "notes.txt").write_text("x" * 1000)
+    cache = PreprocessCache(str(tmp_path), 1)
+    cache.put("a", {"value": "a"})
+
+    # The only entry is over the limit on its own; unrelated files are left alone
+    assert sorted(os.listdir(tmp_path)) == ["notes.txt"]
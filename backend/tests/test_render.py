@@ -0,0 +1,72 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import render
+
+
+def op(name, **args):
+    return {"function_name": name, "function_args": args}
+
+
+def test_chained_trims_are_relative():
+    plan = render.build_plan([op("trim_video", start_time=1, end_time=8), op("trim_video", start_time=2, end_time=4)], 10.0)
+
+    assert [(segment["start"], segment["end"]) for segment in plan] == [(3.0, 5.0)]
+
+
+def test_trim_outside_previous_window_is_rejected():
+    with pytest.raises(ValueError):
+        render.build_plan([op("trim_video", start_time=1, end_time=3), op("trim_video", start_time=5, end_time=6)], 10.0)
+
+
+def test_trim_past_end_of_clip_is_rejected():
+    with pytest.raises(ValueError):
+        render.build_plan([op("trim_video", start_time=12, end_time=13)], 10.0)
+
+
+def test_fade_out_is_placed_at_end_of_segment():
+    plan = render.build_plan([op("trim_video", start_time=1, end_time=3), op("applyFadeOut", duration=0.5)], 10.0)
+
+    assert plan[0]["filters"] == ["fade=t=out:st=1.5:d=0.5"]
+
+
+WEBM_HEADER = """Input #0, matroska,webm, from 'recording.webm':
+  Metadata:
+    encoder         : Chrome
+  Duration: N/A, start: 0.000000, bitrate: N/A
+  Stream #0:0(eng): Video: vp8, yuv420p(progressive), 1280x720, SAR 1:1 DAR 16:9, 30 fps, 30 tbr, 1k tbn (default)
+  Stream #0:1(eng): Audio: opus, 48000 Hz, mono, fltp (default)
+"""
+
+MP4_HEADER = """Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'clip.mp4':
+  Duration: 00:00:10.00, start: 0.000000, bitrate: 1205 kb/s
+  Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), yuv420p(progressive), 1280x720, 30 fps
+  Stream #0:1[0x2](und): Audio: aac (LC) (mp4a / 0x6134706D), 44100 Hz, stereo, fltp, 128 kb/s
+"""
+
+
+def test_webm_is_copied_into_webm():
+    codecs = render.parse_codecs(WEBM_HEADER)
+    assert codecs == ["vp8", "opus"]
+    assert render.copy_container(codecs) == "webm"
+
+    segment = render.build_plan([op("trim_video", start_time=1, end_time=3)], 10.0)[0]
+    command = render._command("recording.webm", segment, "out.webm", False, "webm")
+    assert command[command.index('-c') + 1] == 'copy'
+    assert '-movflags' not in command
+
+
+def test_mp4_is_copied_into_mp4():
+    codecs = render.parse_codecs(MP4_HEADER)
+    assert codecs == ["h264", "aac"]
+    assert render.copy_container(codecs) == "mp4"
+
+
+def test_codecs_without_a_copy_container_are_encoded():
+    assert render.copy_container(["vp8", "aac"]) is None
+
+    segment = render.build_plan([op("trim_video", start_time=1, end_time=3)], 10.0)[0]
+    command = render._command("mixed.mkv", segment, "out.mp4", False, None)
+    assert 'copy' not in command
+    assert 'libx264' in command
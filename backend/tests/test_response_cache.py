@@ -0,0 +1,65 @@
+import pytest
+
+import response_cache
+from response_cache import ResponseCache, request_key
+
+REQUEST = {"model": "gpt-4o", "messages": [{"role": "user", "content": "cut the first clip"}], "tools": []}
+
+
+def test_key_ignores_key_order_and_edge_whitespace():
+    reordered = {"tools": [], "messages": [{"content": "  cut the first clip\r\n", "role": "user"}], "model": "gpt-4o"}
+
+    assert request_key(reordered) == request_key(REQUEST)
+    assert request_key(dict(REQUEST, model="gpt-4o-mini")) != request_key(REQUEST)
+    assert request_key(dict(REQUEST, temperature=0)) != request_key(REQUEST)
+
+
+def test_second_call_is_served_from_the_cache():
+    cache = ResponseCache()
+    calls = []
+
+    def call():
+        calls.append(1)
+        return "response"
+
+    assert cache.get_or_call(REQUEST, call)[:2] == ("response", False)
+    assert cache.get_or_call(REQUEST, call)[:2] == ("response", True)
+    assert calls == [1]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_failed_calls_are_not_cached():
+    cache = ResponseCache()
+
+    def fail():
+        raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_call(REQUEST, fail)
+    assert cache.get_or_call(REQUEST, lambda: "response")[:2] == ("response", False)
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "A", 0.1)
+    cache.put("b", "B", 0.1)
+    cache.get("a")
+    cache.put("c", "C", 0.1)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == ("A", 0.1)
+    assert cache.get("c") == ("C", 0.1)
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    cache = ResponseCache(ttl=60)
+    cache.put("a", "A", 2.0)
+
+    now[0] += 30
+    assert cache.get("a") == ("A", 2.0)
+    assert cache.stats()["latency_saved_seconds"] == 2.0
+    now[0] += 31
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
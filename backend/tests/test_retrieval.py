@@ -0,0 +1,79 @@
+import retrieval
+
+
+def _context(clip_id, start, descriptions, transcription=None, content_hash=None):
+    context = {
+        "clip_id": clip_id,
+        "start": start,
+        "imageDescriptions": descriptions,
+        "transcription": transcription or [""] * len(descriptions)
+    }
+    if content_hash is not None:
+        context["content_hash"] = content_hash
+    return context
+
+
+CONTEXTS = [
+    _context("101", 10, ["a dog runs along the sandy beach", "waves crash on the beach", "a sunset"]),
+    _context("202", 0, ["a cat sleeps on a sofa", "the cat wakes up"], ["", "look at the dog outside"]),
+]
+
+
+def test_search_ranks_by_bm25():
+    index = retrieval.ClipIndex(CONTEXTS)
+
+    # (score, clip, second) best first; the shorter beach document wins the tie on tf
+    hits = index.search("beach")
+    assert [(clip, second) for _, clip, second in hits] == [(0, 1), (0, 0)]
+    assert hits[0][0] > hits[1][0]
+
+    # Transcripts are indexed with the descriptions of the same second
+    assert [(clip, second) for _, clip, second in index.search("dog")] == [(0, 0), (1, 1)]
+
+
+def test_clips_are_referenced_by_timeline_position():
+    index = retrieval.ClipIndex(CONTEXTS)
+
+    # Clip "202" starts first
+    assert index.referenced_clips("trim the first clip") == {1}
+    assert index.referenced_clips("cut clip 2") == {0}
+    assert index.referenced_clips("the last clip") == {0}
+
+
+def test_focus_windows_the_matching_seconds():
+    index = retrieval.ClipIndex(CONTEXTS)
+
+    assert index.focus("sofa") == {1: {0, 1, 2}}
+    assert index.focus("the second clip and the sofa") == {0: None, 1: {0, 1, 2}}
+    assert index.focus("nothing matches") is None
+
+
+def test_cache_reuses_the_index_for_the_same_clips():
+    cache = retrieval.IndexCache()
+    contexts = [_context("a", 0, ["a dog"], content_hash="h1")]
+
+    index = cache.get(contexts)
+    assert cache.get([dict(contexts[0])]) is index
+    # A moved clip, a different result or a different id is a new timeline
+    assert cache.get([dict(contexts[0], start=5)]) is not index
+    assert cache.get([dict(contexts[0], content_hash="h2")]) is not index
+    assert cache.get([dict(contexts[0], clip_id="b")]) is not index
+
+
+def test_cache_hashes_clips_without_a_content_hash():
+    cache = retrieval.IndexCache()
+
+    index = cache.get([_context("a", 0, ["a dog"])])
+    assert cache.get([_context("a", 0, ["a dog"])]) is index
+    assert cache.get([_context("a", 0, ["a cat"])]) is not index
+
+
+def test_cache_evicts_the_least_recently_used():
+    cache = retrieval.IndexCache(max_entries=2)
+    first = cache.get([_context("a", 0, ["one"], content_hash="1")])
+    cache.get([_context("a", 0, ["two"], content_hash="2")])
+    cache.get([_context("a", 0, ["one"], content_hash="1")])
+    cache.get([_context("a", 0, ["three"], content_hash="3")])
+
+    assert len(cache.entries) == 2
+    assert cache.get([_context("a", 0, ["one"], content_hash="1")]) is first
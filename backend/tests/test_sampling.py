@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("cv2")
+
+import sampling
+
+
+def test_one_sample_per_second_is_unchanged():
+    assert sampling.per_second_slots(5, 1.0) == [[0], [1], [2], [3], [4]]
+
+
+def test_faster_samples_are_grouped_by_second():
+    # sample_fps=2 on a 5 s clip
+    assert sampling.per_second_slots(10, 0.5, 5) == [[0, 1], [2, 3], [4, 5], [6, 7], [8, 9]]
+
+
+def test_slower_samples_repeat_until_the_next():
+    # sample_every=2 on a 5 s clip samples 0, 2 and 4 s
+    assert sampling.per_second_slots(3, 2.0, 5) == [[0], [0], [1], [1], [2]]
+
+
+def test_no_samples():
+    assert sampling.per_second_slots(0, 0.5, 5) == []
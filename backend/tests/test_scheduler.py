@@ -0,0 +1,73 @@
+import pytest
+
+from scheduler import ModelScheduler, ScheduledClient
+
+
+class FakeCompletions:
+    def __init__(self, errors=()):
+        self.calls = []
+        self.errors = list(errors)
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"model": kwargs["model"], "content": "ok"}
+
+
+class FakeClient:
+    def __init__(self, errors=()):
+        self.chat = type("Chat", (), {})()
+        self.chat.completions = FakeCompletions(errors)
+        self.audio = type("Audio", (), {})()
+        self.audio.transcriptions = FakeCompletions()
+
+
+def test_create_passes_model_through():
+    client = FakeClient()
+    scheduled = ModelScheduler().wrap(client)
+
+    response = scheduled.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+
+    assert response == {"model": "gpt-4o", "content": "ok"}
+    assert client.chat.completions.calls == [{"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}]
+
+
+def test_audio_transcriptions_go_through_scheduler():
+    client = FakeClient()
+    scheduler = ModelScheduler()
+    scheduler.wrap(client).audio.transcriptions.create(model="whisper-1", file=b"audio")
+
+    assert client.audio.transcriptions.calls == [{"model": "whisper-1", "file": b"audio"}]
+    assert scheduler.stats()["whisper-1"]["calls"] == 1
+
+
+def test_lazy_client_factory():
+    client = FakeClient()
+    built = []
+    scheduled = ScheduledClient(lambda: built.append(1) or client, ModelScheduler())
+    assert built == []
+
+    scheduled.chat.completions.create(model="gpt-4o", messages=[])
+    scheduled.chat.completions.create(model="gpt-4o", messages=[])
+    assert built == [1]
+
+
+def test_retries_connection_errors():
+    client = FakeClient(errors=[ConnectionError("reset")])
+    calls = []
+    scheduler = ModelScheduler(base_delay=0, on_call=lambda model, seconds, result, error: calls.append(error))
+
+    assert scheduler.wrap(client).chat.completions.create(model="gpt-4o", messages=[])["content"] == "ok"
+    assert len(client.chat.completions.calls) == 2
+    assert isinstance(calls[0], ConnectionError) and calls[1] is None
+    assert scheduler.stats()["gpt-4o"]["retries"] == 1
+
+
+def test_does_not_retry_other_errors():
+    client = FakeClient(errors=[ValueError("bad request")])
+    scheduler = ModelScheduler(base_delay=0)
+
+    with pytest.raises(ValueError):
+        scheduler.wrap(client).chat.completions.create(model="gpt-4o", messages=[])
+    assert len(client.chat.completions.calls) == 1
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+import task_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(ttl=86400, max_tasks=10000):
+        if request.param == "memory":
+            return task_store.MemoryTaskStore(ttl, max_tasks)
+        return task_store.SQLiteTaskStore(str(tmp_path / "tasks.db"), ttl, max_tasks)
+    return make
+
+
+def _clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(task_store.time, "time", lambda: now[0])
+    return now
+
+
+def test_steps_advance(make_store):
+    store = make_store()
+    task = store.create(["cut", "move"])
+
+    assert task["current_step"] == -1
+    assert store.advance(task["task_id"])["current_step"] == 0
+    assert store.set_current_step(task["task_id"], 2)["current_step"] == 2
+    assert store.get(task["task_id"]) == {"task_id": task["task_id"], "steps": ["cut", "move"], "current_step": 2}
+
+    store.delete(task["task_id"])
+    assert store.get(task["task_id"]) is None
+    assert store.advance(task["task_id"]) is None
+
+
+def test_idle_tasks_expire(make_store, monkeypatch):
+    now = _clock(monkeypatch)
+    store = make_store(ttl=60)
+    idle = store.create(["a"])["task_id"]
+    used = store.create(["b"])["task_id"]
+
+    now[0] += 40
+    store.get(used)
+    now[0] += 40
+
+    assert store.get(idle) is None
+    assert store.get(used) is not None
+
+
+def test_least_recently_used_is_evicted(make_store, monkeypatch):
+    now = _clock(monkeypatch)
+    store = make_store(max_tasks=2)
+    first = store.create(["a"])["task_id"]
+    now[0] += 1
+    second = store.create(["b"])["task_id"]
+    now[0] += 1
+    # Reading the first task makes the second the least recently used
+    store.get(first)
+    now[0] += 1
+    third = store.create(["c"])["task_id"]
+
+    assert store.get(second) is None
+    assert store.get(first) is not None
+    assert store.get(third) is not None
+
+
+def test_read_task_is_not_expired_behind_an_idle_one(monkeypatch):
+    # A read moves the task to the end of the order, so its age must move with it
+    now = _clock(monkeypatch)
+    store = task_store.MemoryTaskStore(ttl=60)
+    read = store.create(["a"])["task_id"]
+    idle = store.create(["b"])["task_id"]
+
+    now[0] += 50
+    store.get(read)
+    now[0] += 20
+
+    assert store.get(idle) is None
+    assert store.get(read) is not None
+
+
+def test_concurrent_advance_is_atomic(make_store):
+    store = make_store()
+    task_id = store.create(["step"])["task_id"]
+    threads = [
+        threading.Thread(target=lambda: [store.advance(task_id) for _ in range(100)])
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Starts at -1
+    assert store.get(task_id)["current_step"] == 799
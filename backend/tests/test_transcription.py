@@ -0,0 +1,93 @@
+import io
+import threading
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+
+import transcription
+
+# Low enough that minutes of audio stay small
+RATE = 100
+
+
+def _audio(seconds, quiet):
+    # Loud noise with silence over the (start, end) spans in `quiet`
+    samples = np.random.default_rng(0).integers(-20000, 20000, int(seconds * RATE)).astype(np.int16)
+    for start, end in quiet:
+        samples[int(start * RATE):int(end * RATE)] = 0
+    return samples
+
+
+class StubClient:
+    """
+    Stands in for the OpenAI client: each chunk is answered with one word at
+    0.5 s and one just before the chunk's own end, in chunk-local time.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chunks = {}
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self.create))
+
+    def create(self, file, model, response_format, timestamp_granularities):
+        name, audio_bytes = file
+        with wave.open(io.BytesIO(audio_bytes)) as wav:
+            seconds = wav.getnframes() / wav.getframerate()
+        with self.lock:
+            self.chunks[name] = seconds
+        return SimpleNamespace(words=[
+            SimpleNamespace(word=f"{name}-first", start=0.5, end=0.75),
+            SimpleNamespace(word=f"{name}-last", start=seconds - 0.25, end=seconds)
+        ])
+
+
+def test_split_points_fall_in_the_quietest_window():
+    samples = _audio(300, [(110.0, 110.2), (222.0, 222.2)])
+
+    assert transcription.find_split_points(samples, RATE) == [110.0, 222.0]
+
+
+def test_short_audio_is_one_chunk():
+    assert transcription.find_split_points(_audio(100, []), RATE) == []
+
+
+def test_word_times_are_offset_by_their_chunk_start():
+    samples = _audio(300, [(110.0, 110.2), (222.0, 222.2)])
+    client = StubClient()
+
+    words, duration = transcription.transcribe_chunked(
+        client, samples, "whisper-1", RATE, audio_format="wav", max_workers=3
+    )
+
+    assert duration == 300
+    assert client.chunks == {"chunk_0.wav": 110.0, "chunk_1.wav": 112.0, "chunk_2.wav": 78.0}
+    assert [(word["word"], word["start"], word["end"]) for word in words] == [
+        ("chunk_0.wav-first", 0.5, 0.75), ("chunk_0.wav-last", 109.75, 110.0),
+        ("chunk_1.wav-first", 110.5, 110.75), ("chunk_1.wav-last", 221.75, 222.0),
+        ("chunk_2.wav-first", 222.5, 222.75), ("chunk_2.wav-last", 299.75, 300.0),
+    ]
+
+
+def test_cancelled_chunks_are_skipped():
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    words, duration = transcription.transcribe_chunked(
+        StubClient(), _audio(300, [(110.0, 110.2)]), "whisper-1", RATE,
+        audio_format="wav", cancel_event=cancel_event
+    )
+
+    assert words == []
+    assert duration == 300
+
+
+def test_words_are_bucketed_by_second():
+    words = [
+        {"word": "a", "start": 0.2, "end": 0.4},
+        {"word": "b", "start": 1.1, "end": 2.6},
+        {"word": "c", "start": 3.0, "end": 3.5},
+    ]
+
+    # The first and last seconds are dropped
+    assert transcription.bucket_words(words, 5.0) == ["b", "b", "c"]
@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import vision
+
+
+def test_cancel_reaches_frames_already_sent_to_the_executor():
+    started = threading.Event()
+    release = threading.Event()
+    described = []
+
+    def describe_batch(frames):
+        started.set()
+        release.wait(5)
+        described.extend(frames)
+        return [f"frame {frame}" for frame in frames]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        batcher = vision.FrameBatcher(executor, None, describe_batch, batch_size=2)
+        futures = [batcher.add(i) for i in range(6)]
+        started.wait(5)
+        batcher.cancel()
+        release.set()
+
+    # The first batch was already running; the two queued behind it never are
+    assert [future.result() for future in futures[:2]] == ["frame 0", "frame 1"]
+    assert all(future.cancelled() for future in futures[2:])
+    assert described == [0, 1]
+
+
+def test_join_futures_fails_with_first_failure():
+    ok, failed = vision.Future(), vision.Future()
+    joined = vision.join_futures([ok, failed], " Then: ")
+    ok.set_result("a")
+    failed.set_exception(RuntimeError("vision call failed"))
+
+    assert isinstance(joined.exception(), RuntimeError)
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from work_queue import FairWorkQueue
+
+
+@pytest.fixture
+def queue():
+    queue = FairWorkQueue(workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def _hold(queue):
+    # Occupy the only worker until the returned event is set
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+    queue.lane("hold").submit(hold)
+    assert started.wait(5)
+    return release
+
+
+def test_lanes_are_served_round_robin(queue):
+    order = []
+    release = _hold(queue)
+    busy, light = queue.lane("busy"), queue.lane("light")
+    futures = [busy.submit(order.append, f"busy-{i}") for i in range(3)]
+    futures.append(light.submit(order.append, "light-0"))
+
+    release.set()
+    for future in futures:
+        future.result(5)
+    # The light lane doesn't wait behind the whole busy backlog
+    assert order == ["busy-0", "light-0", "busy-1", "busy-2"]
+
+
+def test_results_and_errors_reach_the_futures(queue):
+    lane = queue.lane()
+
+    assert lane.submit(lambda a, b=0: a + b, 1, b=2).result(5) == 3
+    with pytest.raises(ZeroDivisionError):
+        lane.submit(lambda: 1 / 0).result(5)
+
+
+def test_shutdown_of_one_lane_cancels_only_its_queue(queue):
+    release = _hold(queue)
+    failed, other = queue.lane("failed"), queue.lane("other")
+    dropped = [failed.submit(str, i) for i in range(3)]
+    kept = other.submit(str, "kept")
+
+    failed.shutdown(cancel_futures=True)
+    release.set()
+
+    assert all(future.cancelled() for future in dropped)
+    assert kept.result(5) == "kept"
+
+
+def test_stats(queue):
+    release = _hold(queue)
+    lane = queue.lane()
+    futures = [lane.submit(str, i) for i in range(2)]
+    assert queue.stats()["queued"] == 2
+
+    release.set()
+    for future in futures:
+        future.result(5)
+    stats = queue.stats()
+    assert (stats["queued"], stats["completed"], stats["max_queued"]) == (0, 3, 2)
+
+
+def test_queue_refuses_work_after_shutdown():
+    queue = FairWorkQueue(workers=1)
+    queue.shutdown()
+
+    with pytest.raises(RuntimeError):
+        queue.lane().submit(str, 1)
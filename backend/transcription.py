@@ -0,0 +1,170 @@
+import io
+import logging
+import math
+import shutil
+import subprocess
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Chunks stay at or under this length so every upload is far below the API's size limit
+CHUNK_SECONDS = 120.0
+# How far back from a chunk's nominal end to look for the quietest split point
+SEARCH_SECONDS = 15.0
+RMS_WINDOW = 0.05
+
+
+def ffmpeg_exe():
+    # imageio-ffmpeg bundles a static ffmpeg; fall back to one on PATH
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except ImportError:
+        return shutil.which('ffmpeg') or 'ffmpeg'
+
+
+def load_audio(video_path, sample_rate=SAMPLE_RATE, pass_fds=()):
+    """
+    Decode the audio track of `video_path` to mono 16-bit PCM samples. Returns an
+    empty array for files without audio. `pass_fds` keeps file descriptors the
+    path refers to (e.g. /proc/self/fd/N) open in the ffmpeg process.
+    """
+    command = [
+        ffmpeg_exe(), '-nostdin', '-v', 'error', '-i', video_path,
+        '-vn', '-ac', '1', '-ar', str(sample_rate), '-f', 's16le', 'pipe:1'
+    ]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=pass_fds)
+    if result.returncode != 0:
+        if b'does not contain any stream' in result.stderr:
+            return np.zeros(0, dtype=np.int16)
+        raise RuntimeError(f"ffmpeg audio decode failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def rms_envelope(samples, sample_rate=SAMPLE_RATE, window=RMS_WINDOW):
+    hop = max(1, int(sample_rate * window))
+    count = len(samples) // hop
+    frames = samples[:count * hop].astype(np.float32).reshape(count, hop) / 32768.0
+    return np.sqrt(np.mean(frames ** 2, axis=1))
+
+
+def find_split_points(samples, sample_rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS,
+                      search_seconds=SEARCH_SECONDS, window=RMS_WINDOW):
+    """
+    Split times in seconds that cut the audio at its quietest window within the last
+    `search_seconds` of each chunk, so no chunk is longer than `chunk_seconds`.
+    """
+    envelope = rms_envelope(samples, sample_rate, window)
+    total = len(samples) / sample_rate
+    points = []
+    start = 0.0
+
+    while total - start > chunk_seconds:
+        target = start + chunk_seconds
+        low = max(int(start / window) + 1, int((target - search_seconds) / window))
+        high = max(low + 1, int(target / window))
+        quietest = low + int(np.argmin(envelope[low:high]))
+        start = quietest * window
+        points.append(start)
+
+    return points
+
+
+def encode_chunk(samples, sample_rate=SAMPLE_RATE, audio_format='mp3', bitrate='48k'):
+    if audio_format == 'wav':
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(samples.tobytes())
+        return buffer.getvalue()
+
+    command = [
+        ffmpeg_exe(), '-nostdin', '-v', 'error', '-f', 's16le', '-ar', str(sample_rate), '-ac', '1',
+        '-i', 'pipe:0', '-b:a', bitrate, '-f', audio_format, 'pipe:1'
+    ]
+    result = subprocess.run(command, input=samples.tobytes(), stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, check=True)
+    return result.stdout
+
+
+def _transcribe_chunk(client, model, audio_bytes, filename):
+    return client.audio.transcriptions.create(
+        file=(filename, audio_bytes),
+        model=model,
+        response_format="verbose_json",
+        timestamp_granularities=["word"]
+    )
+
+
+def transcribe_chunked(client, samples, model, sample_rate=SAMPLE_RATE, chunk_seconds=CHUNK_SECONDS,
+                       audio_format='mp3', max_workers=4, cancel_event=None, executor=None):
+    """
+    Transcribe mono PCM `samples` as silence-aligned chunks in parallel. Returns the
+    words as dicts with start/end on the global timeline, and the audio duration.
+    Chunks not yet sent are skipped once `cancel_event` is set. Chunks run on
+    `executor` when one is given, otherwise on a pool of `max_workers` threads.
+    """
+    duration = len(samples) / sample_rate
+    if len(samples) == 0:
+        return [], 0.0
+
+    points = find_split_points(samples, sample_rate, chunk_seconds)
+    bounds = [0.0] + points + [duration]
+    chunks = list(zip(bounds[:-1], bounds[1:]))
+    logger.info(f"Transcribing {duration:.1f}s of audio in {len(chunks)} chunks")
+
+    def run(index, start, end):
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        audio_bytes = encode_chunk(samples[int(start * sample_rate):int(end * sample_rate)], sample_rate, audio_format)
+        return _transcribe_chunk(client, model, audio_bytes, f"chunk_{index}.{audio_format}")
+
+    with (nullcontext(executor) if executor is not None else ThreadPoolExecutor(max_workers=max_workers)) as pool:
+        futures = [pool.submit(metrics.bind(run), i, start, end) for i, (start, end) in enumerate(chunks)]
+        try:
+            transcripts = [future.result() for future in futures]
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    words = []
+    for (offset, _), transcript in zip(chunks, transcripts):
+        if transcript is None:
+            continue
+        for word in transcript.words or []:
+            words.append({
+                "word": word.word,
+                "start": word.start + offset,
+                "end": word.end + offset
+            })
+
+    return words, duration
+
+
+def bucket_words(words, duration):
+    """
+    Group words into one string per second of audio. A word spanning several
+    seconds is listed in each of them.
+    """
+    sec_transcription = [[] for _ in range(math.ceil(duration))]
+
+    for word in words:
+        for sec in range(int(word["start"]), min(math.ceil(word["end"]), len(sec_transcription))):
+            sec_transcription[sec].append(word["word"])
+
+    for sec in range(len(sec_transcription)):
+        sec_transcription[sec] = ' '.join(sec_transcription[sec])
+
+    return sec_transcription[1:-1]
+    # This is because there is not really a message at 0 and last frame.. that should also be in the 1st and 2nd last timestamp
@@ -38,3 +38,79 @@ def is_grayscale(image):
 def get_brightness(image):
     return np.mean(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
 
+
+def get_dhash(image, hash_size=8):
+    # Difference hash: one bit per horizontally adjacent pixel pair of a tiny grayscale thumbnail
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    resized = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    diff = resized[:, 1:] > resized[:, :-1]
+    return int.from_bytes(np.packbits(diff.flatten()).tobytes(), 'big')
+
+def hash_distance(hash_a, hash_b):
+    return bin(hash_a ^ hash_b).count('1')  # Hamming distance, 0 means identical thumbnails
+
+# Fused attribute extraction works on frames downscaled to this long edge
+ATTRIBUTE_LONG_EDGE = 320
+
+# ITU-R BT.601 luma weights in BGR order, the same ones cv2.COLOR_BGR2GRAY uses
+GRAY_WEIGHTS = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+def downscale(image, long_edge=ATTRIBUTE_LONG_EDGE):
+    height, width = image.shape[:2]
+    scale = long_edge / max(height, width)
+    if scale >= 1:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+def get_batch_attributes(images, long_edge=ATTRIBUTE_LONG_EDGE, blur=False, color_grading=False):
+    """
+    Attributes for a list of same-sized BGR frames in one vectorized pass over
+    downscaled copies. Returns one dict of plain floats per frame, shaped like the
+    get_rgb_levels / get_saturation / get_contrast / get_brightness results.
+    """
+    if len(images) == 0:
+        return []
+
+    small = [downscale(image, long_edge) for image in images]
+    stack = np.stack(small).astype(np.float32)  # (N, H, W, 3) in BGR order
+
+    channel_means = stack.mean(axis=(1, 2))
+    gray = stack @ GRAY_WEIGHTS
+
+    # HSV saturation as OpenCV defines it for 8-bit images: (max - min) / max * 255
+    high = stack.max(axis=3)
+    low = stack.min(axis=3)
+    saturation = np.divide((high - low) * 255, high, out=np.zeros_like(high), where=high > 0)
+
+    results = []
+    for i in range(len(images)):
+        results.append({
+            "rgb_level": {
+                "Red": float(channel_means[i, 2]),
+                "Green": float(channel_means[i, 1]),
+                "Blue": float(channel_means[i, 0])
+            },
+            "saturation": float(saturation[i].mean()),
+            "contrast": float(gray[i].std()),
+            "brightness": float(gray[i].mean())
+        })
+
+    if blur:
+        # 4-neighbour Laplacian (cv2.Laplacian with ksize=1) over the interior pixels
+        laplacian = (gray[:, :-2, 1:-1] + gray[:, 2:, 1:-1] + gray[:, 1:-1, :-2]
+                     + gray[:, 1:-1, 2:] - 4 * gray[:, 1:-1, 1:-1])
+        for result, variance in zip(results, laplacian.reshape(len(images), -1).var(axis=1)):
+            result["blur"] = float(variance)
+
+    if color_grading:
+        # Stack the frames into one tall image so LAB conversion is a single call
+        lab = cv2.cvtColor(np.concatenate(small), cv2.COLOR_BGR2LAB)
+        ab_means = lab.reshape(len(images), -1, 3)[:, :, 1:].mean(axis=1)
+        for result, (a, b) in zip(results, ab_means):
+            result["color_grading"] = [float(a), float(b)]
+
+    return results
+
+def get_frame_attributes(image, long_edge=ATTRIBUTE_LONG_EDGE, blur=False, color_grading=False):
+    return get_batch_attributes([image], long_edge, blur, color_grading)[0]
@@ -0,0 +1,123 @@
+import threading
+from concurrent.futures import Future
+
+
+def _resolve(future, fn, *args):
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+
+
+def join_futures(futures, separator):
+    """
+    A future for the separator-joined results of string `futures`, failing or
+    cancelling with the first of them that does.
+    """
+    joined = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def finish():
+        return separator.join(future.result() for future in futures)
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        if any(future.cancelled() for future in futures):
+            joined.cancel()
+        else:
+            _resolve(joined, finish)
+
+    for future in futures:
+        future.add_done_callback(on_done)
+    return joined
+
+
+class FrameBatcher:
+    """
+    Collects frames that need a description and sends them `batch_size` at a time
+    through describe_batch(frames) -> [description, ...] on `executor`. With a
+    batch size of 1 each frame goes through describe_one(frame) instead. When a
+    batch answer does not line up with its frames, those frames are described one
+    by one. add() returns a future for each frame's own description.
+    """
+
+    def __init__(self, executor, describe_one, describe_batch, batch_size=1):
+        self.executor = executor
+        self.describe_one = describe_one
+        self.describe_batch = describe_batch
+        self.batch_size = max(1, batch_size)
+        self.pending = []
+        # Futures handed to the executor, so cancel() can reach them before they run
+        self.submitted = []
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.fallback_requests = 0
+
+    def add(self, frame):
+        if self.batch_size == 1:
+            with self.lock:
+                self.requests += 1
+            future = self.executor.submit(self.describe_one, frame)
+            self.submitted.append(future)
+            return future
+
+        future = Future()
+        self.pending.append((frame, future))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return future
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        with self.lock:
+            self.requests += 1
+        self.submitted.extend(future for _, future in batch)
+        self.executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch):
+        live = [(frame, future) for frame, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+
+        try:
+            descriptions = self.describe_batch([frame for frame, _ in live])
+        except Exception as e:
+            for _, future in live:
+                future.set_exception(e)
+            return
+
+        if descriptions is not None and len(descriptions) == len(live):
+            for (_, future), description in zip(live, descriptions):
+                future.set_result(description)
+            return
+
+        for frame, future in live:
+            with self.lock:
+                self.fallback_requests += 1
+            try:
+                future.set_result(self.describe_one(frame))
+            except Exception as e:
+                future.set_exception(e)
+
+    def cancel(self):
+        # Frames not yet sent, and sent ones whose request hasn't started
+        for _, future in self.pending:
+            future.cancel()
+        self.pending = []
+        for future in self.submitted:
+            future.cancel()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "vision_requests": self.requests + self.fallback_requests,
+                "vision_fallback_requests": self.fallback_requests
+            }
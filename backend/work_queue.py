@@ -0,0 +1,114 @@
+import itertools
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from vision import _resolve
+
+
+class FairWorkQueue:
+    """
+    One pool of `workers` threads shared by many lanes, e.g. one lane per video
+    being preprocessed. Each lane keeps its own FIFO, and idle workers take the
+    next item from lanes in round-robin order. A video with hundreds of queued
+    frame descriptions therefore can't starve one that only needs a few.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.lanes = OrderedDict()
+        self.condition = threading.Condition()
+        self.threads = []
+        self.ids = itertools.count()
+        self.stopped = False
+        self.completed = 0
+        self.max_queued = 0
+
+    def _start(self):
+        # Called with the condition held; threads start on first use
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"fair-queue-{len(self.threads)}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def lane(self, name=None):
+        return Lane(self, name if name is not None else f"lane-{next(self.ids)}")
+
+    def _push(self, lane, item):
+        with self.condition:
+            if self.stopped:
+                raise RuntimeError("Work queue is shut down")
+            self._start()
+            queue = self.lanes.setdefault(lane, deque())
+            queue.append(item)
+            self.max_queued = max(self.max_queued, sum(len(q) for q in self.lanes.values()))
+            self.condition.notify()
+
+    def _pop(self):
+        with self.condition:
+            while not self.stopped:
+                for lane in self.lanes:
+                    queue = self.lanes[lane]
+                    if queue:
+                        item = queue.popleft()
+                        # Rotate the lane to the back so the next worker serves another lane
+                        self.lanes.move_to_end(lane)
+                        if not queue:
+                            del self.lanes[lane]
+                        return item
+                self.condition.wait()
+            return None
+
+    def _work(self):
+        while True:
+            item = self._pop()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            _resolve(future, lambda: fn(*args, **kwargs))
+            with self.condition:
+                self.completed += 1
+
+    def _cancel(self, lane):
+        with self.condition:
+            queue = self.lanes.pop(lane, deque())
+        for future, _, _, _ in queue:
+            future.cancel()
+
+    def stats(self):
+        with self.condition:
+            return {
+                "workers": self.workers,
+                "active_lanes": len(self.lanes),
+                "queued": sum(len(queue) for queue in self.lanes.values()),
+                "max_queued": self.max_queued,
+                "completed": self.completed
+            }
+
+    def shutdown(self):
+        with self.condition:
+            self.stopped = True
+            lanes = list(self.lanes)
+            self.condition.notify_all()
+        for lane in lanes:
+            self._cancel(lane)
+
+
+class Lane:
+    # The executor-shaped handle (submit/shutdown) a single producer uses
+    def __init__(self, queue, name):
+        self.queue = queue
+        self.name = name
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.queue._push(self, (future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        # Work already running finishes on the shared workers; `wait` is not supported
+        if cancel_futures:
+            self.queue._cancel(self)
+
+    def __repr__(self):
+        return f"Lane({self.name!r})"
@@ -26,6 +26,10 @@ const ffmpeg = createFFmpeg({
   corePath: "https://unpkg.com/@ffmpeg/core@0.8.5/dist/ffmpeg-core.js",
 });
 
+// "step" asks /api/chatv2 for one function call per request; "batch" gets every
+// planned call back from the first request
+const CHAT_EXECUTION = process.env.NEXT_PUBLIC_CHAT_EXECUTION || "step";
+
 export default function Home() {
   const [socket, setSocket] = useState(null);
   const [isConnected, setIsConnected] = useState(false);
@@ -113,6 +117,7 @@ export default function Home() {
         imageDescriptions: media.imageDescriptions,
         imageAttributes: media.imageAttributes,
         transcription: media.transcription,
+        content_hash: media.contentHash,
       };
 
       // Add the new clip to the single track
@@ -384,16 +389,31 @@ export default function Home() {
     return newMedia.id;
   };
 
-  const cutClipGpt = async (clipId, cutPoint, tempTimeline, tempMediaList) => {
+  const cutClipGpt = async (
+    clipId,
+    cutPoint,
+    tempTimeline,
+    tempMediaList,
+    createdIds = []
+  ) => {
     const clipToCut = tempTimeline[0].find((c) => c.clip_id === clipId);
     if (!clipToCut) {
       console.error("Clip not found with ID:", clipId);
       return;
     }
 
+    // Batched calls can cut several clips within the same millisecond
+    const takenIds = new Set(tempTimeline[0].map((c) => c.clip_id));
+    let nextId = Date.now();
+    const newClipId = () => {
+      while (takenIds.has(nextId.toString())) nextId++;
+      takenIds.add(nextId.toString());
+      return nextId.toString();
+    };
+
     // Calculate the first half
     const firstHalf = {
-      clip_id: Date.now().toString(),
+      clip_id: newClipId(),
       mediaId: clipToCut.mediaId,
       start: clipToCut.start,
       duration: cutPoint,
@@ -404,10 +424,11 @@ export default function Home() {
       ),
       imageAttributes: clipToCut.imageAttributes.slice(0, Math.ceil(cutPoint)),
       transcription: clipToCut.transcription.slice(0, Math.ceil(cutPoint)),
+      content_hash: clipToCut.content_hash,
     };
 
     const secondHalf = {
-      clip_id: (Date.now() + 1).toString(),
+      clip_id: newClipId(),
       mediaId: clipToCut.mediaId,
       start: clipToCut.start + cutPoint,
       duration: clipToCut.duration - cutPoint,
@@ -415,6 +436,7 @@ export default function Home() {
       imageDescriptions: clipToCut.imageDescriptions.slice(Math.ceil(cutPoint)),
       imageAttributes: clipToCut.imageAttributes.slice(Math.ceil(cutPoint)),
       transcription: clipToCut.transcription.slice(Math.ceil(cutPoint)),
+      content_hash: clipToCut.content_hash,
     };
 
     // Create copy and update secondHalf
@@ -429,6 +451,7 @@ export default function Home() {
     tempTimeline[0] = tempTimeline[0].flatMap((c) =>
       c.clip_id === clipToCut.clip_id ? [firstHalf, secondHalf] : c
     );
+    createdIds.push(firstHalf.clip_id, secondHalf.clip_id);
     return tempTimeline;
   };
 
@@ -454,6 +477,7 @@ export default function Home() {
       ),
       imageAttributes: clipToCut.imageAttributes.slice(0, Math.ceil(cutPoint)),
       transcription: clipToCut.transcription.slice(0, Math.ceil(cutPoint)),
+      content_hash: clipToCut.content_hash,
     };
 
     const secondHalf = {
@@ -466,6 +490,7 @@ export default function Home() {
       imageDescriptions: clipToCut.imageDescriptions.slice(Math.ceil(cutPoint)),
       imageAttributes: clipToCut.imageAttributes.slice(Math.ceil(cutPoint)),
       transcription: clipToCut.transcription.slice(Math.ceil(cutPoint)),
+      content_hash: clipToCut.content_hash,
     };
 
     // Create copy and update secondHalf
@@ -558,6 +583,7 @@ export default function Home() {
           messages: [...messagesToSend, { role: "user", content: userMessage }],
           clipContexts: clipsInRange,
           type: "new_chat",
+          execution: CHAT_EXECUTION,
         }),
       });
       // Get clip contexts
@@ -566,11 +592,11 @@ export default function Home() {
         const functionArgs = JSON.parse(data.function_args);
         console.log(data.function_name);
         console.log(functionArgs);
-        const selectedClip = timelineTracks[0].find(
+        const selectedClip = tempTimeline[0].find(
           (clip) => clip.clip_id === functionArgs.clipId
         );
         console.log(selectedClip);
-        const videoUrl = mediaList.find(
+        const videoUrl = tempMediaList.find(
           (m) => m.id === selectedClip?.mediaId
         )?.url;
         console.log(videoUrl);
@@ -582,10 +608,31 @@ export default function Home() {
       let tempTimeline = [...timelineTracks];
       let tempMediaList = [...mediaList];
 
+      // Batch mode returns every call at once. Later calls refer to clips made
+      // by an earlier cutClip with the placeholder ids in its "creates", which
+      // are mapped to the ids cutClipGpt actually gives them
+      const pendingCalls =
+        responseData.type == "function_calls" ? [...responseData.calls] : [];
+      const clipIdMap = {};
+
       console.log("first response");
       console.log(responseData);
 
-      while (responseData.type == "function_call") {
+      while (responseData.type == "function_call" || pendingCalls.length) {
+        const fromBatch = pendingCalls.length > 0;
+        if (fromBatch) {
+          const call = pendingCalls.shift();
+          const callArgs = JSON.parse(call.function_args);
+          if (callArgs.clipId !== undefined) {
+            callArgs.clipId =
+              clipIdMap[String(callArgs.clipId)] ?? String(callArgs.clipId);
+          }
+          responseData = {
+            ...call,
+            type: "function_call",
+            function_args: JSON.stringify(callArgs),
+          };
+        }
         const functionArgs = JSON.parse(responseData.function_args);
         // Add function call message to chat history
         setMessages((prev) => [
@@ -605,12 +652,17 @@ export default function Home() {
 
         // Call the respective function based on the function name
         if (responseData.function_name === "cutClip") {
+          const createdIds = [];
           tempTimeline = await cutClipGpt(
             functionArgs.clipId,
             functionArgs.cutPoint,
             tempTimeline,
-            tempMediaList
+            tempMediaList,
+            createdIds
           );
+          (responseData.creates || []).forEach((placeholder, i) => {
+            clipIdMap[placeholder] = createdIds[i];
+          });
 
           setTimelineTracks(JSON.parse(JSON.stringify(tempTimeline)));
           setMediaList(JSON.parse(JSON.stringify(tempMediaList)));
@@ -632,7 +684,7 @@ export default function Home() {
           const [functionArgs, selectedClip, videoUrl] =
             parseModifyJson(responseData);
           if (videoUrl) {
-            const selectedMedia = mediaList.find(
+            const selectedMedia = tempMediaList.find(
               (m) => m.id === selectedClip?.mediaId
             );
             const newMediaId = await adjustBrightness(
@@ -657,7 +709,7 @@ export default function Home() {
           const [functionArgs, selectedClip, videoUrl] =
             parseModifyJson(responseData);
           if (videoUrl) {
-            const selectedMedia = mediaList.find(
+            const selectedMedia = tempMediaList.find(
               (m) => m.id === selectedClip?.mediaId
             );
             const newMediaId = await applyColorGrading(
@@ -684,7 +736,7 @@ export default function Home() {
           const [functionArgs, selectedClip, videoUrl] =
             parseModifyJson(responseData);
           if (videoUrl) {
-            const selectedMedia = mediaList.find(
+            const selectedMedia = tempMediaList.find(
               (m) => m.id === selectedClip?.mediaId
             );
             const newMediaId = await adjustSaturation(
@@ -709,7 +761,7 @@ export default function Home() {
           const [functionArgs, selectedClip, videoUrl] =
             parseModifyJson(responseData);
           if (videoUrl) {
-            const selectedMedia = mediaList.find(
+            const selectedMedia = tempMediaList.find(
               (m) => m.id === selectedClip?.mediaId
             );
             const newMediaId = await addBlurEffect(
@@ -734,7 +786,7 @@ export default function Home() {
           const [functionArgs, selectedClip, videoUrl] =
             parseModifyJson(responseData);
           if (videoUrl) {
-            const selectedMedia = mediaList.find(
+            const selectedMedia = tempMediaList.find(
               (m) => m.id == selectedClip?.mediaId
             );
 
@@ -762,10 +814,10 @@ export default function Home() {
         }
 
         if (responseData.function_name === "trim_video") {
-          const selectedClip = timelineTracks[0].find(
+          const selectedClip = tempTimeline[0].find(
             (clip) => clip.clip_id === functionArgs.clipId
           );
-          const selectedMedia = mediaList.find(
+          const selectedMedia = tempMediaList.find(
             (m) => m.id === selectedClip?.mediaId
           );
           if (!selectedMedia) {
@@ -794,7 +846,7 @@ export default function Home() {
           const [functionArgs, selectedClip, videoUrl] =
             parseModifyJson(responseData);
           if (videoUrl) {
-            const selectedMedia = mediaList.find(
+            const selectedMedia = tempMediaList.find(
               (m) => m.id === selectedClip?.mediaId
             );
             const newMediaId = await applyFadeIn(
@@ -819,7 +871,7 @@ export default function Home() {
           const [functionArgs, selectedClip, videoUrl] =
             parseModifyJson(responseData);
           if (videoUrl) {
-            const selectedMedia = mediaList.find(
+            const selectedMedia = tempMediaList.find(
               (m) => m.id === selectedClip?.mediaId
             );
             const newMediaId = await applyFadeOut(
@@ -843,6 +895,14 @@ export default function Home() {
         console.log(`temp timeline`);
         console.log(tempTimeline);
 
+        if (fromBatch) {
+          // Every call came with the first response; nothing to ask for
+          if (!pendingCalls.length) {
+            responseData = { type: "task_end" };
+          }
+          continue;
+        }
+
         const tempClipsInRange = tempTimeline[0]
           .filter((clip) => {
             const clipEnd = clip.start + clip.duration;
@@ -851,7 +911,7 @@ export default function Home() {
           .map((clip) => ({
             ...clip,
             mediaName:
-              mediaList.find((m) => m.id === clip.mediaId)?.name || "Unknown",
+              tempMediaList.find((m) => m.id === clip.mediaId)?.name || "Unknown",
           }));
 
         await new Promise((resolve) => setTimeout(resolve, 1000));
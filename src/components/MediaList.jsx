@@ -105,7 +105,8 @@ export default function MediaList({
             loading: false,
             imageDescriptions: data.image_description,
             imageAttributes: data.image_attr,
-            transcription: data.transcription
+            transcription: data.transcription,
+            contentHash: data.report?.content_hash
           } : m
         )
       );